@@ -2,18 +2,29 @@ from ninja import NinjaAPI
 from ninja.security import django_auth
 from core.utils.auth import GlobalAuth
 from core.utils.version import get_version
+from core.utils.renderers import FastJSONParser, FastJSONRenderer
 
 # Import routers from apps
 from core.api.auth import router
+from core.api.batch import batch_router
+from core.api.events import events_router
+from core.api.tasks import tasks_router
 from options.api.routers.health import health_router
 from options.api.routers.version import version_router
 
-api = NinjaAPI(auth=[django_auth, GlobalAuth()])
+api = NinjaAPI(
+    auth=[django_auth, GlobalAuth()],
+    renderer=FastJSONRenderer(),
+    parser=FastJSONParser(),
+)
 api.title = "LenoreSchedule"
 api.version = get_version()
 api.description = "API documetation for LenoreSchedule"
 
 # Add routers to the API
 api.add_router("/accounts", router)
+api.add_router("/batch", batch_router)
+api.add_router("/events", events_router)
+api.add_router("/tasks", tasks_router)
 api.add_router("/options/health", health_router)
 api.add_router("/options/version", version_router)
@@ -56,8 +56,17 @@ INSTALLED_APPS = [
     "django_q",
 ]
 
+# gunicorn.conf.py sets DJANGO_PROCESS=web. Web workers skip apps that only
+# provide management commands or unused admin extras; `manage.py` and the
+# qcluster still load everything.
+DJANGO_PROCESS = os.environ.get("DJANGO_PROCESS", "")
+WEB_EXCLUDED_APPS = ["import_export", "dbbackup", "django_filters"]
+if DJANGO_PROCESS == "web":
+    INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in WEB_EXCLUDED_APPS]
+
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "core.middleware.ReplicaRoutingMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -103,6 +112,29 @@ DATABASES = {
     }
 }
 
+# Read replicas, comma separated: host or host:port for Postgres, database
+# files for SQLite. Reads of safe web requests are routed to them by
+# core.routers.ReplicaRouter; tasks and commands always use the primary.
+DATABASE_REPLICAS = []
+for replica in filter(None, os.environ.get("SQL_REPLICAS", "").split(",")):
+    alias = f"replica{len(DATABASE_REPLICAS) + 1}"
+    DATABASES[alias] = {**DATABASES["default"], "TEST": {"MIRROR": "default"}}
+    if "sqlite" in DATABASES[alias]["ENGINE"]:
+        DATABASES[alias]["NAME"] = replica.strip()
+    else:
+        host, _, port = replica.strip().partition(":")
+        DATABASES[alias].update(HOST=host, PORT=port or DATABASES[alias]["PORT"])
+    DATABASE_REPLICAS.append(alias)
+
+# Clients that wrote read from the primary for REPLICA_STICKY_SECONDS;
+# replicas further behind than REPLICA_MAX_LAG stop serving reads, so keep
+# the sticky window above it.
+DATABASE_ROUTERS = ["core.routers.ReplicaRouter"]
+REPLICA_STICKY_SECONDS = int(os.environ.get("REPLICA_STICKY_SECONDS", 15))
+REPLICA_STICKY_COOKIE = "primary_until"
+REPLICA_MAX_LAG = float(os.environ.get("REPLICA_MAX_LAG", 10))
+REPLICA_HEALTH_INTERVAL = 5
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -141,6 +173,17 @@ USE_TZ = True
 STATIC_URL = "/static/"
 STATIC_ROOT = BASE_DIR / "staticfiles"
 
+# collectstatic fingerprints files and writes .gz/.br variants next to them;
+# check the result with `manage.py verify_static`
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "core.storage.CompressedManifestStaticFilesStorage"},
+}
+STATIC_COMPRESS_MIN_SIZE = 256
+STATIC_COMPRESS_MIN_RATIO = 0.95
+# Quality 11 is ~20x slower than 9 for a few percent smaller files
+STATIC_BROTLI_QUALITY = 9
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
@@ -167,10 +210,18 @@ DBBACKUP_STORAGE_OPTIONS = {"location": "/backups/"}
 DBBACKUP_CLEANUP_KEEP = 2
 DBBACKUP_CLEANUP_KEEP_MEDIA = 2
 
+# Scheduled backups (core.services.backup)
+BACKUP_COMPRESSOR = os.environ.get("BACKUP_COMPRESSOR", "auto")  # zstd, pigz, gzip
+BACKUP_COMPRESS_THREADS = int(os.environ.get("BACKUP_COMPRESS_THREADS", "0"))
+# Dropped and recreated by every verify run; the name must end with _verify
+BACKUP_VERIFY_DATABASE = os.environ.get("BACKUP_VERIFY_DATABASE")
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 LOG_DIR = BASE_DIR / "logs"
 LOG_DIR.mkdir(exist_ok=True)
 
+# File handlers open their file on the first record, not at every start-up
+
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
@@ -197,6 +248,7 @@ LOGGING = {
             "filename": str(LOG_DIR / "db.log"),
             "maxBytes": 1024 * 1024 * 5,  # 5MB
             "backupCount": 5,
+            "delay": True,
             "formatter": "standard",
             "level": DB_LOG_LEVEL,
         },
@@ -205,6 +257,7 @@ LOGGING = {
             "filename": str(LOG_DIR / "api.log"),
             "maxBytes": 1024 * 1024 * 5,
             "backupCount": 5,
+            "delay": True,
             "formatter": "standard",
             "level": DB_LOG_LEVEL,
         },
@@ -213,6 +266,7 @@ LOGGING = {
             "filename": str(LOG_DIR / "error.log"),
             "maxBytes": 1024 * 1024 * 5,
             "backupCount": 5,
+            "delay": True,
             "formatter": "detailed",
             "level": DB_LOG_LEVEL,
         },
@@ -221,6 +275,7 @@ LOGGING = {
             "filename": str(LOG_DIR / "task.log"),
             "maxBytes": 1024 * 1024 * 5,
             "backupCount": 5,
+            "delay": True,
             "formatter": "standard",
             "level": DB_LOG_LEVEL,
         },
@@ -257,19 +312,74 @@ LOGGING = {
     },
 }
 
+# Skip pydantic re-validation of responses built with
+# core.utils.renderers.trusted_response (validated while debugging)
+API_SKIP_RESPONSE_VALIDATION = not DEBUG
+
+# Below this many rows core.utils.db.estimated_count counts exactly
+ESTIMATED_COUNT_THRESHOLD = 10000
+
+# Limits for the /batch endpoint (core.api.batch)
+API_BATCH_MAX_ITEMS = 20
+API_BATCH_MAX_WORKERS = int(os.environ.get("API_BATCH_MAX_WORKERS", "4"))
+
+# Server-Sent Events (core.api.events)
+EVENTS_CHANNEL = "lenoreschedule_events"
+EVENTS_POLL_INTERVAL = 1.0
+EVENTS_HEARTBEAT = 15
+EVENTS_RETRY_MS = 3000
+EVENTS_BUFFER_SIZE = 1000
+# Seconds to hold back events behind an id not committed yet before taking
+# it as rolled back (see core.services.events.EventHub)
+EVENTS_GAP_TIMEOUT = 10
+EVENTS_RETENTION_HOURS = 24
+# Open streams per process: on the ASGI app (start_events.sh), and on WSGI
+# workers, where each stream holds one of the gunicorn threads
+EVENTS_MAX_STREAMS = int(os.environ.get("EVENTS_MAX_STREAMS", 1000))
+EVENTS_MAX_SYNC_STREAMS = int(os.environ.get("EVENTS_MAX_SYNC_STREAMS", 8))
+
+# Lease length in seconds for core.utils.locks; renewed every third of it
+TASK_LOCK_LEASE = 60
+
+# Rows per batch for the requeue and purge admin actions on django-q results
+ADMIN_TASK_BATCH_SIZE = 1000
+
 Q_CLUSTER = {
     "name": "DjangORM",
-    "workers": 4,
+    "workers": int(os.environ.get("Q_CLUSTER_WORKERS", "4")),
+    # Restart a worker after this many tasks or once its RSS passes max_rss KB
+    "recycle": int(os.environ.get("Q_CLUSTER_RECYCLE", "500")),
+    "max_rss": int(os.environ.get("Q_CLUSTER_MAX_RSS", "262144")),
     "timeout": 599,
     "retry": 600,
-    "queue_limit": 50,
-    "bulk": 10,
+    # Tasks a cluster claims ahead of its workers; qsupervisor lowers both
+    # for its clusters so queued work stays visible to its scaling
+    "queue_limit": int(os.environ.get("Q_CLUSTER_QUEUE_LIMIT", "50")),
+    "bulk": int(os.environ.get("Q_CLUSTER_BULK", "10")),
+    # Whether this cluster polls schedules; qsupervisor runs it in one
+    # cluster only so a schedule cannot fire once per cluster
+    "scheduler": bool(int(os.environ.get("Q_CLUSTER_SCHEDULER", "1"))),
     "orm": "default",
     "max_attempts": 1,
     "label": "Tasks",
     "catch_up": False,
 }
 
+# Autoscaling for `manage.py qsupervisor` (QCLUSTER_AUTOSCALE=1 in start_worker.sh)
+QSUPERVISOR = {
+    "min_workers": int(os.environ.get("QSUPERVISOR_MIN_WORKERS", "2")),
+    "max_workers": int(os.environ.get("QSUPERVISOR_MAX_WORKERS", "8")),
+    "workers_per_cluster": 2,
+    # Seconds between queue checks
+    "interval": 15,
+    # Scale up when more than this many tasks are waiting per worker...
+    "scale_up_depth": 5,
+    # ...or the oldest task has waited longer than this many seconds
+    "scale_up_wait": 30,
+    # Scale down after this many consecutive checks with an empty queue
+    "scale_down_idle_ticks": 8,
+}
+
 JAZZMIN_SETTINGS = {
     "show_ui_builder": bool(int(os.environ.get("DEBUG"))),
     # title of the window (Will default to current_admin_site.site_title if absent or None)
@@ -2,3 +2,14 @@
 from backend.settings import *
 
 VITE_API_KEY = "test-api-key"
+
+# A second database for the replica routing tests, which switch routing to
+# it on by overriding DATABASE_REPLICAS
+DATABASES["replica"] = {**DATABASES["default"], "NAME": BASE_DIR / "replica.sqlite3"}
+
+# Tests run with DEBUG off and without collectstatic, so the manifest storage
+# would fail every template that uses {% static %}
+STORAGES = {
+    **STORAGES,
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
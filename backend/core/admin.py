@@ -0,0 +1,241 @@
+from datetime import timedelta
+from django import forms
+from django.conf import settings
+from django.contrib import admin, messages
+from django.contrib.admin import helpers
+from django.template.response import TemplateResponse
+from django.utils import timezone
+from django_q import admin as q_admin
+from django_q.models import Failure, Schedule, Success
+from django_q.tasks import async_task
+from core.models import TaskLock, TaskRunRecord, Workflow, WorkflowStep
+from core.utils.pagination import EstimatedCountPaginator
+
+# Register your models here.
+
+
+class ReadOnlyAdmin(admin.ModelAdmin):
+    def has_add_permission(self, request):
+        # Return False to disable adding
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        # Return False to disable editing
+        return False
+
+
+class PurgeTasksForm(forms.Form):
+    days = forms.IntegerField(min_value=0, initial=30, label="Older than (days)")
+
+
+def _enqueue_batches(func, queryset, *args):
+    """
+    The function `_enqueue_batches` hands the primary keys of an admin
+    selection to a background task, `ADMIN_TASK_BATCH_SIZE` keys per task.
+    Plain ids are queued rather than the pickled query, which only loads
+    under the Django version that pickled it.
+
+    Args:
+        func (str): The dotted path of the task, called as
+            `func(model_label, pks, *args)`.
+        queryset (QuerySet): The selection.
+        *args: Further arguments for every task.
+
+    Returns:
+        tuple: the number of rows and the number of tasks queued
+    """
+    label = queryset.model._meta.label
+    size = settings.ADMIN_TASK_BATCH_SIZE
+    pks = queryset.order_by("pk").values_list("pk", flat=True)
+    rows = batches = 0
+    batch = []
+    for pk in pks.iterator(chunk_size=size):
+        batch.append(pk)
+        if len(batch) == size:
+            async_task(func, label, batch, *args)
+            rows, batches, batch = rows + size, batches + 1, []
+    if batch:
+        async_task(func, label, batch, *args)
+        rows, batches = rows + len(batch), batches + 1
+    return rows, batches
+
+
+@admin.action(description="Requeue selected tasks in the background")
+def requeue_selected(modeladmin, request, queryset):
+    rows, batches = _enqueue_batches("core.tasks.requeue_tasks", queryset)
+    modeladmin.message_user(
+        request,
+        f"Requeueing {rows} selected tasks in the background ({batches} batches).",
+        messages.SUCCESS,
+    )
+
+
+@admin.action(description="Delete selected tasks older than...")
+def purge_selected(modeladmin, request, queryset):
+    form = PurgeTasksForm(request.POST if "apply" in request.POST else None)
+    if form.is_valid():
+        before = timezone.now() - timedelta(days=form.cleaned_data["days"])
+        rows, batches = _enqueue_batches(
+            "core.tasks.purge_tasks", queryset.filter(stopped__lt=before), before
+        )
+        modeladmin.message_user(
+            request,
+            f"Deleting {rows} selected tasks stopped before "
+            f"{before:%Y-%m-%d %H:%M} in the background ({batches} batches).",
+            messages.SUCCESS,
+        )
+        return None
+
+    return TemplateResponse(
+        request,
+        "admin/core/purge_tasks.html",
+        {
+            **modeladmin.admin_site.each_context(request),
+            "title": "Delete tasks older than",
+            "opts": modeladmin.model._meta,
+            "form": form,
+            "action_checkbox_name": helpers.ACTION_CHECKBOX_NAME,
+            "selected": request.POST.getlist(helpers.ACTION_CHECKBOX_NAME),
+            "select_across": request.POST.get("select_across", "0"),
+        },
+    )
+
+
+class FastChangelistMixin:
+    """
+    Changelist settings for tables with millions of rows: the page count is
+    estimated instead of counted, ordering and filters follow the indexes
+    added in core migration 0004, and `list_deferred` columns (pickled
+    payloads) are left out of the changelist query.
+    """
+
+    paginator = EstimatedCountPaginator
+
+    show_full_result_count = False
+
+    list_deferred = []
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        match = request.resolver_match
+        if match and match.url_name and match.url_name.endswith("_changelist"):
+            queryset = queryset.defer(*self.list_deferred)
+        return queryset
+
+
+class SuccessAdmin(FastChangelistMixin, q_admin.TaskAdmin):
+    ordering = ["-stopped", "-id"]
+
+    list_filter = [("stopped", admin.DateFieldListFilter)]
+
+    search_fields = ["=id", "^name", "=group", "^func"]
+
+    list_deferred = ["args", "kwargs", "result"]
+
+    actions = [requeue_selected, purge_selected]
+
+
+class FailureAdmin(FastChangelistMixin, q_admin.FailAdmin):
+    ordering = ["-stopped", "-id"]
+
+    list_filter = [("stopped", admin.DateFieldListFilter)]
+
+    search_fields = ["=id", "^name", "=group", "^func"]
+
+    # `short_result` is listed, so only the arguments are deferred
+    list_deferred = ["args", "kwargs"]
+
+    actions = [requeue_selected, purge_selected]
+
+
+class ScheduleAdmin(FastChangelistMixin, q_admin.ScheduleAdmin):
+    ordering = ["next_run", "id"]
+
+    list_filter = ["next_run", "schedule_type"]
+
+    list_deferred = ["args", "kwargs", "hook", "cron", "intended_date_kwarg"]
+
+
+class TaskLockAdmin(ReadOnlyAdmin):
+    list_display = ["key", "owner", "acquired", "expires", "pending"]
+
+    list_display_links = ["key"]
+
+    ordering = ["key"]
+
+
+class TaskRunRecordAdmin(ReadOnlyAdmin):
+    list_display = ["key", "outcome", "wait_seconds", "detail", "created"]
+
+    list_display_links = ["key"]
+
+    list_filter = ["outcome", "key"]
+
+    ordering = ["-created"]
+
+
+class WorkflowStepInline(admin.TabularInline):
+    model = WorkflowStep
+
+    fields = [
+        "stage",
+        "position",
+        "func",
+        "status",
+        "task_id",
+        "queued",
+        "started",
+        "stopped",
+        "wait",
+        "duration",
+    ]
+
+    readonly_fields = fields
+
+    extra = 0
+
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+    @admin.display(description="Wait")
+    def wait(self, obj):
+        if obj.queued and obj.started:
+            return obj.started - obj.queued
+        return None
+
+    @admin.display(description="Duration")
+    def duration(self, obj):
+        if obj.started and obj.stopped:
+            return obj.stopped - obj.started
+        return None
+
+
+class WorkflowAdmin(ReadOnlyAdmin):
+    list_display = ["name", "status", "on_failure", "created", "finished", "duration"]
+
+    list_display_links = ["name"]
+
+    list_filter = ["status", "name"]
+
+    ordering = ["-created"]
+
+    inlines = [WorkflowStepInline]
+
+    @admin.display(description="Duration")
+    def duration(self, obj):
+        if obj.finished:
+            return obj.finished - obj.created
+        return None
+
+
+# django_q.admin is imported above, so its registrations exist to replace
+for model in (Success, Failure, Schedule):
+    admin.site.unregister(model)
+admin.site.register(Success, SuccessAdmin)
+admin.site.register(Failure, FailureAdmin)
+admin.site.register(Schedule, ScheduleAdmin)
+admin.site.register(TaskLock, TaskLockAdmin)
+admin.site.register(TaskRunRecord, TaskRunRecordAdmin)
+admin.site.register(Workflow, WorkflowAdmin)
@@ -0,0 +1,266 @@
+import copy
+import inspect
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from typing import Any, Awaitable, Dict, List, Optional, Tuple
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.sessions.backends.base import SessionBase
+from django.db import connections
+from django.http import HttpRequest, HttpResponse, QueryDict, StreamingHttpResponse
+from django.http.response import HttpResponseBase
+from django.urls import Resolver404, resolve
+from ninja import Router, Schema
+from ninja.errors import HttpError
+
+from core.middleware import SAFE_METHODS
+from core.utils.renderers import dumps, loads
+
+api_logger = logging.getLogger("api")
+db_logger = logging.getLogger("db")
+error_logger = logging.getLogger("error")
+task_logger = logging.getLogger("task")
+
+batch_router = Router(tags=["Batch"])
+
+# Set on sub-requests by get_token()/rotate_token(); read by CsrfViewMiddleware
+CSRF_META = ("CSRF_COOKIE", "CSRF_COOKIE_NEEDS_UPDATE")
+
+Dispatched = Tuple[Dict[str, Any], Optional[HttpRequest], Optional[HttpResponseBase]]
+
+
+class BatchItemIn(Schema):
+    id: Optional[str] = None
+    method: str = "GET"
+    path: str
+    body: Optional[Any] = None
+
+
+class BatchIn(Schema):
+    requests: List[BatchItemIn]
+
+
+class BatchItemOut(Schema):
+    id: Optional[str] = None
+    status: int
+    body: Any = None
+
+
+@batch_router.post("/", response=List[BatchItemOut])
+def batch(request: HttpRequest, response: HttpResponse, payload: BatchIn):
+    """
+    The function `batch` runs several API calls in one HTTP round-trip. Each
+    sub-request is dispatched in-process to its ninja operation, reusing the
+    session, user and headers already resolved for this request, and reports
+    its own status code. Cookies set by sub-requests (including a CSRF
+    cookie requested through `get_token`) are sent on the batch response.
+
+    Paths are relative to the API root, as used by the frontend api clients
+    (e.g. `/options/version/list`). Sub-requests that may write run one
+    after another in the request thread; runs of consecutive GET, HEAD and
+    OPTIONS sub-requests between them use up to `API_BATCH_MAX_WORKERS`
+    threads.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+        response (HttpResponse): The batch response, to carry cookies over.
+        payload (BatchIn): The sub-requests to run.
+
+    Returns:
+        List[BatchItemOut]: one result per sub-request, in request order
+    """
+    max_items = getattr(settings, "API_BATCH_MAX_ITEMS", 20)
+    if len(payload.requests) > max_items:
+        raise HttpError(400, f"A batch may contain at most {max_items} requests")
+
+    # Resolve the session and user once so every sub-request shares them
+    request.user.is_authenticated
+    api_root = request.path.rsplit("batch", 1)[0]
+
+    max_workers = getattr(settings, "API_BATCH_MAX_WORKERS", 1)
+    dispatched = []
+    reads = []
+    for item in payload.requests:
+        if item.method.upper() in SAFE_METHODS:
+            reads.append(item)
+            continue
+        # Anything that may write (the session included) runs on its own,
+        # in order, in the request thread
+        dispatched += _dispatch_reads(request, reads, api_root, max_workers)
+        reads = []
+        dispatched.append(_dispatch(request, item, api_root))
+    dispatched += _dispatch_reads(request, reads, api_root, max_workers)
+
+    results = []
+    for result, sub_request, sub_response in dispatched:
+        _carry_over(request, response, sub_request, sub_response)
+        results.append(result)
+    return results
+
+
+def _carry_over(
+    request: HttpRequest,
+    response: HttpResponse,
+    sub_request: Optional[HttpRequest],
+    sub_response: Optional[HttpResponseBase],
+) -> None:
+    # Sub-requests work on copies of META and their responses are discarded,
+    # so hand the CSRF cookie flags and any cookies set back to the parent
+    if sub_request is not None and sub_request.META.get("CSRF_COOKIE_NEEDS_UPDATE"):
+        for key in CSRF_META:
+            request.META[key] = sub_request.META[key]
+    if sub_response is not None:
+        for name, morsel in sub_response.cookies.items():
+            response.cookies[name] = morsel
+
+
+def _dispatch_reads(
+    request: HttpRequest, items: List[BatchItemIn], api_root: str, max_workers: int
+) -> List[Dispatched]:
+    """
+    The function `_dispatch_reads` runs consecutive safe (read-only)
+    sub-requests, concurrently when more than one worker is allowed.
+    Threaded sub-requests get a snapshot of the session instead of the
+    shared, not thread-safe SessionStore, and close their own database
+    connections when done.
+
+    Args:
+        request (HttpRequest): The parent batch request.
+        items (List[BatchItemIn]): The safe sub-requests to run.
+        api_root (str): The URL prefix the API is mounted on.
+        max_workers (int): The most threads to use.
+
+    Returns:
+        List[Dispatched]: one entry per item, in order
+    """
+    max_workers = min(max_workers, len(items))
+    if max_workers <= 1:
+        return [_dispatch(request, item, api_root) for item in items]
+
+    session = _session_snapshot(request)
+    # Threads do not inherit context variables; run every item in a copy
+    # of this one so reads keep the request's database routing state
+    contexts = [copy_context() for _ in items]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(
+            executor.map(
+                lambda item, context: context.run(
+                    _dispatch_in_thread, request, item, api_root, session
+                ),
+                items,
+                contexts,
+            )
+        )
+
+
+def _dispatch_in_thread(
+    request: HttpRequest,
+    item: BatchItemIn,
+    api_root: str,
+    session: Optional[SessionBase],
+) -> Dispatched:
+    try:
+        return _dispatch(request, item, api_root, session)
+    finally:
+        connections.close_all()
+
+
+def _session_snapshot(request: HttpRequest) -> Optional[SessionBase]:
+    # A detached copy of the session data; it is never saved, so changes
+    # made by a read-only sub-request are dropped
+    if not hasattr(request, "session"):
+        return None
+    snapshot = SessionBase(request.session.session_key)
+    snapshot._session_cache = dict(request.session.items())
+    return snapshot
+
+
+def _dispatch(
+    request: HttpRequest,
+    item: BatchItemIn,
+    api_root: str,
+    session: Optional[SessionBase] = None,
+) -> Dispatched:
+    """
+    The function `_dispatch` runs one sub-request against the view resolved
+    for its path.
+
+    Args:
+        request (HttpRequest): The parent batch request.
+        item (BatchItemIn): The sub-request to run.
+        api_root (str): The URL prefix the API is mounted on.
+        session (SessionBase, optional): Replaces the shared session, for
+            sub-requests running on another thread.
+
+    Returns:
+        tuple: the sub-request id, status code and decoded body, then the
+            sub-request and its response (None if it never ran)
+    """
+    path, _, query = item.path.partition("?")
+    full_path = api_root + path.lstrip("/")
+    if full_path.rstrip("/") == request.path.rstrip("/"):
+        return (
+            _result(item, 400, {"detail": "Batch requests cannot be nested"}),
+            None,
+            None,
+        )
+
+    try:
+        match = resolve(full_path)
+    except Resolver404:
+        return _result(item, 404, {"detail": "Not Found"}), None, None
+
+    method = item.method.upper()
+    sub_request = copy.copy(request)
+    sub_request.method = method
+    sub_request.path = sub_request.path_info = full_path
+    sub_request.GET = QueryDict(query)
+    sub_request.META = {
+        **request.META,
+        "REQUEST_METHOD": method,
+        "PATH_INFO": full_path,
+        "QUERY_STRING": query,
+        "CONTENT_TYPE": "application/json",
+    }
+    sub_request._body = dumps(item.body) if item.body is not None else b""
+    sub_request.resolver_match = match
+    if session is not None:
+        sub_request.session = session
+    for attr in ("_post", "_files"):
+        sub_request.__dict__.pop(attr, None)
+
+    try:
+        response = match.func(sub_request, *match.args, **match.kwargs)
+        if inspect.isawaitable(response):
+            # Async operations (e.g. the event stream) return a coroutine
+            response = async_to_sync(_await)(response)
+    except Exception as e:
+        api_logger.error(f"Batch sub-request {method} {path} failed")
+        error_logger.error(f"{str(e)}")
+        return (
+            _result(item, 500, {"detail": "Internal server error"}),
+            sub_request,
+            None,
+        )
+
+    if isinstance(response, StreamingHttpResponse):
+        response.close()
+        result = _result(item, 400, {"detail": "Streaming responses cannot be batched"})
+        return result, sub_request, None
+
+    body = response.content
+    if response.get("Content-Type", "").startswith("application/json") and body:
+        body = loads(body)
+    else:
+        body = body.decode(response.charset or "utf-8")
+    return _result(item, response.status_code, body), sub_request, response
+
+
+async def _await(awaitable: Awaitable) -> Any:
+    return await awaitable
+
+
+def _result(item: BatchItemIn, status: int, body: Any) -> Dict[str, Any]:
+    return {"id": item.id, "status": status, "body": body}
@@ -0,0 +1,114 @@
+import logging
+from typing import AsyncIterator, Iterator, Optional
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpRequest, StreamingHttpResponse
+from ninja import Router
+
+from core.services.events import hub
+from core.utils.renderers import dumps, trusted_response
+
+api_logger = logging.getLogger("api")
+db_logger = logging.getLogger("db")
+error_logger = logging.getLogger("error")
+task_logger = logging.getLogger("task")
+
+events_router = Router(tags=["Events"])
+
+
+@events_router.get("/stream")
+async def stream_events(request: HttpRequest, last_event_id: Optional[int] = None):
+    """
+    The function `stream_events` opens a Server-Sent Events stream of
+    schedule, task result and version changes. Reconnecting clients resume
+    after the id sent in the `Last-Event-ID` header (or the `last_event_id`
+    query parameter); new clients only receive changes from now on.
+
+    Streams are served by the ASGI app (start_events.sh) where an open
+    stream only waits on the event loop, up to `EVENTS_MAX_STREAMS` per
+    process. Under WSGI every stream holds a worker thread, so at most
+    `EVENTS_MAX_SYNC_STREAMS` are allowed; further clients get a 503 and
+    retry.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+        last_event_id (int, optional): The id of the last event received.
+
+    Returns:
+        StreamingHttpResponse: a `text/event-stream` response
+    """
+    header = request.headers.get("Last-Event-ID", "")
+    if header.isdigit():
+        last_event_id = int(header)
+
+    asgi = isinstance(request, ASGIRequest)
+    limit = settings.EVENTS_MAX_STREAMS if asgi else settings.EVENTS_MAX_SYNC_STREAMS
+    if hub.subscribers >= limit:
+        api_logger.warning(f"Event stream refused, {hub.subscribers} already open")
+        refused = trusted_response(
+            {"detail": "Too many open event streams"}, status=503
+        )
+        refused["Retry-After"] = str(settings.EVENTS_RETRY_MS // 1000)
+        return refused
+    api_logger.debug(f"Event stream opened after {last_event_id}")
+
+    # The hub is subscribed to by the stream itself, so a response that is
+    # never iterated (client gone, batched request) registers nothing
+    stream = _async_event_stream if asgi else _event_stream
+    response = StreamingHttpResponse(
+        stream(last_event_id), content_type="text/event-stream"
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+def _event_stream(last_event_id: Optional[int]) -> Iterator[str]:
+    hub.subscribe()
+    try:
+        if last_event_id is None:
+            last_event_id = hub.last_id
+        yield f"retry: {settings.EVENTS_RETRY_MS}\n\n"
+        while True:
+            events = hub.wait(last_event_id, timeout=settings.EVENTS_HEARTBEAT)
+            if not events:
+                yield ": keep-alive\n\n"
+                continue
+            for event in events:
+                yield _format(event)
+                last_event_id = event.id
+    finally:
+        hub.unsubscribe()
+
+
+async def _async_event_stream(last_event_id: Optional[int]) -> AsyncIterator[str]:
+    await hub.asubscribe()
+    try:
+        if last_event_id is None:
+            last_event_id = hub.last_id
+        yield f"retry: {settings.EVENTS_RETRY_MS}\n\n"
+        while True:
+            events = await hub.await_events(
+                last_event_id, timeout=settings.EVENTS_HEARTBEAT
+            )
+            if not events:
+                yield ": keep-alive\n\n"
+                continue
+            for event in events:
+                yield _format(event)
+                last_event_id = event.id
+    finally:
+        hub.unsubscribe()
+
+
+def _format(event) -> str:
+    data = dumps(
+        {
+            "kind": event.kind,
+            "object_id": event.object_id,
+            "payload": event.payload,
+            "created": event.created,
+        }
+    ).decode("utf-8")
+    return f"id: {event.id}\nevent: {event.kind}\ndata: {data}\n\n"
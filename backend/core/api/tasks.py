@@ -0,0 +1,111 @@
+from datetime import datetime
+from typing import List, Optional
+
+from django.http import HttpRequest
+from django_q.models import Failure, Schedule, Success
+from ninja import Router, Schema
+from ninja.pagination import paginate
+
+from core.utils.pagination import KeysetPagination
+from core.utils.renderers import trusted
+
+tasks_router = Router(tags=["Tasks"])
+
+SCHEDULE_FIELDS = (
+    "id",
+    "name",
+    "func",
+    "schedule_type",
+    "minutes",
+    "repeats",
+    "next_run",
+    "cron",
+    "cluster",
+)
+
+TASK_FIELDS = (
+    "id",
+    "name",
+    "func",
+    "group",
+    "cluster",
+    "started",
+    "stopped",
+    "success",
+    "attempt_count",
+)
+
+
+class ScheduleOut(Schema):
+    id: int
+    name: Optional[str] = None
+    func: str
+    schedule_type: str
+    minutes: Optional[int] = None
+    repeats: int
+    next_run: Optional[datetime] = None
+    cron: Optional[str] = None
+    cluster: Optional[str] = None
+
+
+class TaskOut(Schema):
+    id: str
+    name: str
+    func: str
+    group: Optional[str] = None
+    cluster: Optional[str] = None
+    started: datetime
+    stopped: datetime
+    success: bool
+    attempt_count: int
+
+
+@tasks_router.get("/schedule/list", response=List[ScheduleOut])
+@trusted(ScheduleOut)
+@paginate(KeysetPagination, ordering=("pk",))
+def list_schedules(request: HttpRequest):
+    """
+    The function `list_schedules` retrieves the configured django-q schedules,
+    one keyset page at a time.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        List[ScheduleOut]: a page of schedule objects
+    """
+    return Schedule.objects.values(*SCHEDULE_FIELDS)
+
+
+@tasks_router.get("/success/list", response=List[TaskOut])
+@trusted(TaskOut)
+@paginate(KeysetPagination, ordering=("-stopped",))
+def list_successes(request: HttpRequest):
+    """
+    The function `list_successes` retrieves successful task runs, newest
+    first, one keyset page at a time.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        List[TaskOut]: a page of task objects
+    """
+    return Success.objects.values(*TASK_FIELDS)
+
+
+@tasks_router.get("/failure/list", response=List[TaskOut])
+@trusted(TaskOut)
+@paginate(KeysetPagination, ordering=("-stopped",))
+def list_failures(request: HttpRequest):
+    """
+    The function `list_failures` retrieves failed task runs, newest first,
+    one keyset page at a time.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        List[TaskOut]: a page of task objects
+    """
+    return Failure.objects.values(*TASK_FIELDS)
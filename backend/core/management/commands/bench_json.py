@@ -0,0 +1,110 @@
+"""
+Module: bench_json.py
+Description: Micro-benchmark of API JSON rendering for large list payloads.
+
+Compares django-ninja's stock renderer against core.utils.renderers, with and
+without pydantic response validation.
+"""
+
+import timeit
+from datetime import timedelta
+from typing import List, Optional
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from ninja import Schema
+from ninja.renderers import JSONRenderer
+
+from core.utils import renderers
+
+
+class BenchItemOut(Schema):
+    id: int
+    name: str
+    func: str
+    args: Optional[str] = None
+    schedule_type: str
+    minutes: Optional[int] = None
+    repeats: int
+    next_run: Optional[str] = None
+    success: bool
+    tags: List[str]
+
+
+class Command(BaseCommand):
+    help = "Benchmarks JSON serialization of large list payloads."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            nargs="+",
+            type=int,
+            default=[100, 1000, 10000],
+            help="List lengths to benchmark.",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="Number of runs per measurement; the best one is reported.",
+        )
+
+    def handle(self, *args, **options):
+        """
+        The function `handle` renders synthetic schedule-like payloads of each
+        requested size and prints the best timing of every strategy.
+
+        Args:
+            self: The class instance.
+            *args: Additional positional arguments.
+            **options: Additional keyword arguments.
+        """
+        stock = JSONRenderer()
+        fast = renderers.FastJSONRenderer()
+        backend = "orjson" if renderers.orjson is not None else "stdlib json"
+        self.stdout.write(f"FastJSONRenderer backend: {backend}")
+
+        for size in options["sizes"]:
+            data = self._payload(size)
+            cases = {
+                "stock renderer": lambda: stock.render(
+                    None, data, response_status=200
+                ),
+                "fast renderer": lambda: fast.render(None, data, response_status=200),
+                "validate + stock": lambda: stock.render(
+                    None, self._validated(data), response_status=200
+                ),
+                "validate + fast": lambda: fast.render(
+                    None, self._validated(data), response_status=200
+                ),
+            }
+            self.stdout.write(f"\n{size} items")
+            baseline = None
+            for label, func in cases.items():
+                best = min(timeit.repeat(func, number=1, repeat=options["repeat"]))
+                baseline = baseline or best
+                self.stdout.write(
+                    f"  {label:<18} {best * 1000:9.2f} ms"
+                    f"  ({baseline / best:5.2f}x)"
+                )
+
+    def _payload(self, size):
+        now = timezone.now()
+        return [
+            {
+                "id": i,
+                "name": f"Schedule {i}",
+                "func": "core.tasks.test_task",
+                "args": None,
+                "schedule_type": "H",
+                "minutes": None,
+                "repeats": -1,
+                "next_run": (now + timedelta(minutes=i)).isoformat(),
+                "success": bool(i % 2),
+                "tags": ["nightly", "import"],
+            }
+            for i in range(size)
+        ]
+
+    def _validated(self, data):
+        return [BenchItemOut.model_validate(item).model_dump() for item in data]
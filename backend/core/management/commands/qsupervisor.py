@@ -0,0 +1,171 @@
+"""
+Module: qsupervisor.py
+Description: Run django-q clusters, scaled with the depth of the ORM queue.
+
+Each cluster is a `qcluster` child process with `workers_per_cluster`
+workers. The supervisor adds a cluster when the queue is deep or tasks wait
+too long, and stops one after the queue has stayed empty for a while.
+Workers inside each cluster are recycled by django-q itself after
+`Q_CLUSTER["recycle"]` tasks or when they pass `Q_CLUSTER["max_rss"]`.
+
+Clusters only claim as many tasks ahead as they have workers (queue_limit
+and bulk), so the backlog stays in the shared queue where a new cluster
+can pick it up. Only one cluster runs the django-q scheduler; when it
+exits, the next cluster started takes it over.
+"""
+
+import logging
+import os
+import signal
+import subprocess
+import sys
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.db.models import Min
+from django.utils import timezone
+from django_q.models import OrmQ
+
+api_logger = logging.getLogger("api")
+db_logger = logging.getLogger("db")
+error_logger = logging.getLogger("error")
+task_logger = logging.getLogger("task")
+
+
+class Command(BaseCommand):
+    help = "Runs qcluster processes scaled with the task queue depth."
+
+    def handle(self, *args, **options):
+        """
+        The function `handle` runs the scaling loop until the process is
+        asked to stop, then stops every cluster gracefully.
+
+        Args:
+            self: The class instance.
+            *args: Additional positional arguments.
+            **options: Additional keyword arguments.
+        """
+        self.conf = settings.QSUPERVISOR
+        self.clusters = []
+        self.draining = []
+        self.scheduler = None
+        self.idle_ticks = 0
+        self.stopping = threading.Event()
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        task_logger.info(
+            f"qsupervisor starting: {self.conf['min_workers']}-"
+            f"{self.conf['max_workers']} workers, "
+            f"{self.conf['workers_per_cluster']} per cluster"
+        )
+        while not self.stopping.is_set():
+            self._reap()
+            while self._workers() < self.conf["min_workers"]:
+                self._start_cluster("below minimum")
+            try:
+                depth, wait = self._queue_stats()
+            except Exception as e:
+                db_logger.error("qsupervisor could not read the queue")
+                error_logger.error(f"{str(e)}")
+            else:
+                self._scale(depth, wait)
+            # Woken early by SIGTERM so the clusters drain within the stop grace
+            self.stopping.wait(self.conf["interval"])
+
+        task_logger.info("qsupervisor stopping clusters")
+        for process in self.clusters + self.draining:
+            process.send_signal(signal.SIGTERM)
+        for process in self.clusters + self.draining:
+            process.wait()
+
+    def _scale(self, depth, wait):
+        workers = self._workers()
+        busy = (
+            depth > workers * self.conf["scale_up_depth"]
+            or wait > self.conf["scale_up_wait"]
+        )
+        if busy:
+            self.idle_ticks = 0
+            if workers + self.conf["workers_per_cluster"] <= self.conf["max_workers"]:
+                self._start_cluster(f"queue depth {depth}, oldest waiting {wait:.0f}s")
+        elif depth == 0:
+            self.idle_ticks += 1
+            if (
+                self.idle_ticks >= self.conf["scale_down_idle_ticks"]
+                and workers - self.conf["workers_per_cluster"]
+                >= self.conf["min_workers"]
+            ):
+                self.idle_ticks = 0
+                self._stop_cluster(
+                    f"queue idle for {self.conf['scale_down_idle_ticks']} ticks"
+                )
+        else:
+            self.idle_ticks = 0
+
+    def _queue_stats(self):
+        # Every OrmQ row is work not yet done: unlocked rows are waiting (their
+        # lock holds the enqueue time), locked ones were claimed by a cluster
+        # and are running or sit in its local queue until the lock expires
+        close_old_connections()
+        now = timezone.now()
+        queued = OrmQ.objects.using(settings.Q_CLUSTER["orm"]).filter(
+            key=settings.Q_CLUSTER["name"]
+        )
+        stats = queued.filter(lock__lte=now).aggregate(oldest=Min("lock"))
+        depth = queued.count()
+        wait = (now - stats["oldest"]).total_seconds() if stats["oldest"] else 0
+        return depth, wait
+
+    def _workers(self):
+        return len(self.clusters) * self.conf["workers_per_cluster"]
+
+    def _start_cluster(self, reason):
+        workers = str(self.conf["workers_per_cluster"])
+        scheduler = self.scheduler is None
+        env = {
+            **os.environ,
+            "Q_CLUSTER_WORKERS": workers,
+            "Q_CLUSTER_QUEUE_LIMIT": workers,
+            "Q_CLUSTER_BULK": workers,
+            "Q_CLUSTER_SCHEDULER": "1" if scheduler else "0",
+        }
+        process = subprocess.Popen(
+            [sys.executable, "manage.py", "qcluster"], env=env, cwd=settings.BASE_DIR
+        )
+        self.clusters.append(process)
+        if scheduler:
+            self.scheduler = process
+        task_logger.info(
+            f"qsupervisor scaled up to {self._workers()} workers "
+            f"(cluster pid {process.pid}): {reason}"
+        )
+
+    def _stop_cluster(self, reason):
+        # The newest cluster goes first; the scheduler runs in the oldest
+        process = self.clusters.pop()
+        if process is self.scheduler:
+            self.scheduler = None
+        process.send_signal(signal.SIGTERM)
+        self.draining.append(process)
+        task_logger.info(
+            f"qsupervisor scaled down to {self._workers()} workers "
+            f"(draining cluster pid {process.pid}): {reason}"
+        )
+
+    def _reap(self):
+        for process in list(self.clusters):
+            if process.poll() is not None:
+                self.clusters.remove(process)
+                if process is self.scheduler:
+                    self.scheduler = None
+                task_logger.warning(
+                    f"qsupervisor cluster pid {process.pid} exited "
+                    f"with code {process.returncode}"
+                )
+        self.draining = [p for p in self.draining if p.poll() is None]
+
+    def _stop(self, signum, frame):
+        self.stopping.set()
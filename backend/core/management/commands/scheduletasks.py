@@ -10,7 +10,7 @@ from django.core.management.base import BaseCommand
 from django_q.models import Schedule
 from datetime import timedelta, datetime
 from django.utils import timezone
-import pytz
+from zoneinfo import ZoneInfo
 import os
 
 
@@ -30,7 +30,7 @@ class Command(BaseCommand):
 
         # Calculate the next run date for scheduled tasks
         today_utc = timezone.now()
-        tz_timezone = pytz.timezone(os.environ.get("TIMEZONE"))
+        tz_timezone = ZoneInfo(os.environ.get("TIMEZONE"))
         today = today_utc.astimezone(tz_timezone).date()
         current_timezone = timezone.get_current_timezone()
         tomorrow = today + timedelta(days=1)
@@ -46,10 +46,62 @@ class Command(BaseCommand):
                 "start_today": True,
                 "delete": False,
             },
+            {
+                "task_name": "Purge Change Events",
+                "function": "core.tasks.purge_change_events",
+                "time": "00:00",
+                "arguments": "",
+                "type": "HOURLY",  # DAILY, HOURLY, MINUTES
+                "concurrency": "skip",  # allow, skip, queue, replace
+                "start_today": True,
+                "delete": False,
+            },
+            {
+                "task_name": "Backup Database",
+                "function": "core.tasks.backup_database",
+                "time": "02:00",
+                "arguments": "",
+                "type": "DAILY",  # DAILY, HOURLY, MINUTES
+                "concurrency": "skip",  # allow, skip, queue, replace
+                "start_today": False,
+                "delete": True,  # replaced by the Nightly Backup workflow
+            },
+            {
+                "task_name": "Backup Media",
+                "function": "core.tasks.backup_media",
+                "time": "02:30",
+                "arguments": "",
+                "type": "DAILY",  # DAILY, HOURLY, MINUTES
+                "concurrency": "skip",  # allow, skip, queue, replace
+                "start_today": False,
+                "delete": True,  # replaced by the Nightly Backup workflow
+            },
+            {
+                "task_name": "Verify Database Backup",
+                "function": "core.tasks.verify_database_backup",
+                "time": "03:30",
+                "arguments": "",
+                "type": "DAILY",  # DAILY, HOURLY, MINUTES
+                "concurrency": "skip",  # allow, skip, queue, replace
+                "start_today": False,
+                "delete": True,  # replaced by the Nightly Backup workflow
+            },
+            {
+                "task_name": "Nightly Backup",
+                "workflow": "nightly_backup",  # registered in core.workflows
+                "time": "02:00",
+                "type": "DAILY",  # DAILY, HOURLY, MINUTES
+                "start_today": False,
+                "delete": False,
+            },
         ]
 
         # Schedule or modify tasks
         for task in tasks:
+            # Workflows are started through core.tasks.run_workflow
+            if task.get("workflow"):
+                task["function"] = "core.tasks.run_workflow"
+                task["arguments"] = repr(task["workflow"])
             next_run = ""
             schedule_type = ""
             if task["start_today"]:
@@ -60,8 +112,15 @@ class Command(BaseCommand):
                 next_run = datetime.combine(
                     tomorrow, datetime.strptime(task["time"], "%H:%M").time()
                 )
-            next_run = tz_timezone.localize(next_run)
+            next_run = next_run.replace(tzinfo=tz_timezone)
             next_run = next_run.astimezone(current_timezone)
+            # Guarded tasks (core.utils.locks.guarded) lock per schedule
+            kwargs = ""
+            if task.get("concurrency"):
+                kwargs = (
+                    f"_schedule={task['task_name']!r}, "
+                    f"_concurrency={task['concurrency']!r}"
+                )
             if task["type"] == "DAILY":
                 schedule_type = Schedule.DAILY
             elif task["type"] == "HOURLY":
@@ -78,6 +137,7 @@ class Command(BaseCommand):
                 else:
                     existing_schedule.func = task["function"]
                     existing_schedule.args = task["arguments"]
+                    existing_schedule.kwargs = kwargs
                     existing_schedule.next_run = next_run
                     existing_schedule.schedule_type = schedule_type
                     if task["type"] == "MINUTES":
@@ -89,6 +149,7 @@ class Command(BaseCommand):
                         Schedule.objects.create(
                             func=task["function"],
                             args=task["arguments"],
+                            kwargs=kwargs,
                             schedule_type=schedule_type,
                             name=task["task_name"],
                             next_run=next_run,
@@ -97,6 +158,7 @@ class Command(BaseCommand):
                         Schedule.objects.create(
                             func=task["function"],
                             args=task["arguments"],
+                            kwargs=kwargs,
                             schedule_type=schedule_type,
                             name=task["task_name"],
                             next_run=next_run,
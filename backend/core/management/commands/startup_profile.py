@@ -0,0 +1,171 @@
+"""
+Module: startup_profile.py
+Description: Report where process start-up time goes.
+
+Boots Django in a fresh interpreter under `python -X importtime` and prints
+the total set-up time and peak RSS, the cost of each app (module import,
+models import and `ready()`) and a tree of the slowest module imports. Use
+`--web` to profile the app set of a gunicorn worker (`DJANGO_PROCESS=web`).
+"""
+
+import json
+import os
+import subprocess
+import sys
+from typing import Any, Dict, List
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Runs in the child interpreter; wraps every AppConfig to time its stages
+PROBE = """
+import json, resource, time
+from django.apps import config
+
+apps = {}
+create = config.AppConfig.create.__func__
+
+
+def timed(label, stage, func):
+    def wrapper():
+        started = time.perf_counter()
+        try:
+            return func()
+        finally:
+            apps[label][stage] += (time.perf_counter() - started) * 1000
+    return wrapper
+
+
+def timed_create(cls, entry):
+    started = time.perf_counter()
+    app_config = create(cls, entry)
+    label = app_config.label
+    apps[label] = {"name": app_config.name, "models": 0.0, "ready": 0.0}
+    apps[label]["import"] = (time.perf_counter() - started) * 1000
+    app_config.import_models = timed(label, "models", app_config.import_models)
+    app_config.ready = timed(label, "ready", app_config.ready)
+    return app_config
+
+
+config.AppConfig.create = classmethod(timed_create)
+started = time.perf_counter()
+import django
+django.setup()
+setup = (time.perf_counter() - started) * 1000
+started = time.perf_counter()
+from django.urls import get_resolver
+get_resolver().url_patterns
+urls = (time.perf_counter() - started) * 1000
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({"setup": setup, "urls": urls, "rss_kb": rss, "apps": apps}))
+"""
+
+
+class Command(BaseCommand):
+    help = "Profiles Django start-up: import times, app ready() cost and RSS."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--web",
+            action="store_true",
+            help="Profile the app set loaded by gunicorn web workers.",
+        )
+        parser.add_argument(
+            "--min-ms",
+            type=float,
+            default=5.0,
+            help="Hide imports whose cumulative time is below this.",
+        )
+        parser.add_argument(
+            "--depth",
+            type=int,
+            default=4,
+            help="Maximum depth of the import tree.",
+        )
+
+    def handle(self, *args, **options):
+        """
+        The function `handle` boots Django in a child process and prints the
+        start-up summary, per app timings and the import tree.
+
+        Args:
+            self: The class instance.
+            *args: Additional positional arguments.
+            **options: Additional keyword arguments.
+        """
+        env = {**os.environ, "DJANGO_SETTINGS_MODULE": settings.SETTINGS_MODULE}
+        env.pop("DJANGO_PROCESS", None)
+        if options["web"]:
+            env["DJANGO_PROCESS"] = "web"
+
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", PROBE],
+            cwd=settings.BASE_DIR,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            raise CommandError(f"Start-up failed:\n{result.stderr[-2000:]}")
+
+        report = json.loads(result.stdout.strip().splitlines()[-1])
+        tree = self._parse_importtime(result.stderr)
+        total = sum(node["cumulative"] for node in tree) / 1000
+
+        self.stdout.write(f"Profile: {'web worker' if options['web'] else 'full'}")
+        self.stdout.write(f"  imports        {total:9.1f} ms")
+        self.stdout.write(f"  django.setup() {report['setup']:9.1f} ms")
+        self.stdout.write(f"  URLconf        {report['urls']:9.1f} ms")
+        self.stdout.write(f"  peak RSS       {report['rss_kb'] / 1024:9.1f} MB")
+
+        self.stdout.write("\nApps (ms)                  import   models    ready")
+        apps = sorted(
+            report["apps"].values(),
+            key=lambda app: app["import"] + app["models"] + app["ready"],
+            reverse=True,
+        )
+        for app in apps:
+            self.stdout.write(
+                f"  {app['name'][:24]:24} {app['import']:8.1f} "
+                f"{app['models']:8.1f} {app['ready']:8.1f}"
+            )
+
+        self.stdout.write(
+            f"\nImports over {options['min_ms']} ms (cumulative / self ms)"
+        )
+        for node in sorted(tree, key=lambda n: n["cumulative"], reverse=True):
+            self._write_node(node, 0, options)
+
+    def _parse_importtime(self, stderr: str) -> List[Dict[str, Any]]:
+        # -X importtime prints children before their parent, indented by 2
+        pending = []
+        for line in stderr.splitlines():
+            if not line.startswith("import time:") or "imported package" in line:
+                continue
+            self_us, cumulative_us, name = line[len("import time:") :].split("|", 2)
+            level = (len(name) - len(name.lstrip()) - 1) // 2
+            children = []
+            while pending and pending[-1]["level"] > level:
+                children.insert(0, pending.pop())
+            pending.append(
+                {
+                    "name": name.strip(),
+                    "level": level,
+                    "self": int(self_us),
+                    "cumulative": int(cumulative_us),
+                    "children": children,
+                }
+            )
+        return pending
+
+    def _write_node(self, node: Dict[str, Any], depth: int, options) -> None:
+        if node["cumulative"] / 1000 < options["min_ms"] or depth >= options["depth"]:
+            return
+        self.stdout.write(
+            f"  {'  ' * depth}{node['name']}  "
+            f"{node['cumulative'] / 1000:.1f} / {node['self'] / 1000:.1f}"
+        )
+        for child in sorted(
+            node["children"], key=lambda n: n["cumulative"], reverse=True
+        ):
+            self._write_node(child, depth + 1, options)
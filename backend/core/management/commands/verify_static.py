@@ -0,0 +1,96 @@
+"""
+Module: verify_static.py
+Description: Check the collectstatic output served by nginx.
+
+Reads `staticfiles.json` written by core.storage and reports how many files
+are fingerprinted, the bytes the .gz/.br variants save over the originals,
+compressible files missing a variant, and assets on disk that have no
+fingerprinted name (and so cannot be cached as immutable).
+"""
+
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management.base import BaseCommand, CommandError
+
+from core.storage import is_compressible
+
+VARIANTS = (".gz", ".br")
+
+
+class Command(BaseCommand):
+    help = "Reports fingerprinting and precompression of collected static files."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--strict",
+            action="store_true",
+            help="Exit with an error if unhashed assets or missing variants exist.",
+        )
+
+    def handle(self, *args, **options):
+        """
+        The function `handle` walks `STATIC_ROOT` against the manifest and
+        prints the savings and problems found.
+
+        Args:
+            self: The class instance.
+            *args: Additional positional arguments.
+            **options: Additional keyword arguments.
+        """
+        root = Path(settings.STATIC_ROOT)
+        manifest_path = root / staticfiles_storage.manifest_name
+        if not manifest_path.exists():
+            raise CommandError(
+                f"{manifest_path} not found; run collectstatic with "
+                "core.storage.CompressedManifestStaticFilesStorage first."
+            )
+        with open(manifest_path) as manifest:
+            paths = json.load(manifest)["paths"]
+        originals, hashed = set(paths), set(paths.values())
+
+        unhashed = []
+        missing = []
+        saved = {suffix: 0 for suffix in VARIANTS}
+        original_bytes = 0
+        for path in sorted(root.rglob("*")):
+            name = path.relative_to(root).as_posix()
+            if not path.is_file() or name == staticfiles_storage.manifest_name:
+                continue
+            if name.endswith(VARIANTS):
+                continue
+            if name not in originals and name not in hashed:
+                unhashed.append(name)
+            if name not in hashed or not is_compressible(name):
+                continue
+
+            size = path.stat().st_size
+            original_bytes += size
+            found = False
+            for suffix in VARIANTS:
+                variant = Path(f"{path}{suffix}")
+                if variant.exists():
+                    found = True
+                    saved[suffix] += size - variant.stat().st_size
+            if not found and size >= settings.STATIC_COMPRESS_MIN_SIZE:
+                missing.append(name)
+
+        self.stdout.write(f"Fingerprinted files: {len(hashed)}")
+        self.stdout.write(f"Compressible bytes:  {original_bytes}")
+        for suffix in VARIANTS:
+            percent = saved[suffix] * 100 / original_bytes if original_bytes else 0
+            self.stdout.write(
+                f"Saved by {suffix:3}:        {saved[suffix]} bytes ({percent:.1f}%)"
+            )
+
+        self._report("Unhashed assets", unhashed)
+        self._report("Compressible files without a variant", missing)
+        if options["strict"] and (unhashed or missing):
+            raise CommandError("Static files are not fully fingerprinted/compressed.")
+
+    def _report(self, title, names):
+        self.stdout.write(f"{title}: {len(names)}")
+        for name in names:
+            self.stdout.write(f"  {name}")
@@ -0,0 +1,50 @@
+import logging
+import time
+
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse
+
+from core.routers import replica_reads
+
+api_logger = logging.getLogger("api")
+db_logger = logging.getLogger("db")
+error_logger = logging.getLogger("error")
+task_logger = logging.getLogger("task")
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Lets safe requests read from the database replicas (see
+    core.routers.ReplicaRouter). A request that writes sets a cookie that
+    keeps the client on the primary for `REPLICA_STICKY_SECONDS`, so it
+    reads its own writes while the replicas catch up.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+
+        allowed = request.method in SAFE_METHODS and not self._sticky(request)
+        with replica_reads(allowed) as state:
+            response = self.get_response(request)
+
+        if state.wrote:
+            window = settings.REPLICA_STICKY_SECONDS
+            response.set_cookie(
+                settings.REPLICA_STICKY_COOKIE,
+                str(int(time.time() + window)),
+                max_age=window,
+                httponly=True,
+                samesite="Lax",
+                secure=request.is_secure(),
+            )
+        return response
+
+    def _sticky(self, request: HttpRequest) -> bool:
+        until = request.COOKIES.get(settings.REPLICA_STICKY_COOKIE, "")
+        return until.isdigit() and int(until) > time.time()
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.10 on 2026-10-19 14:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskLock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=200, unique=True)),
+                ('owner', models.CharField(blank=True, default='', max_length=32)),
+                ('backend_pid', models.IntegerField(blank=True, null=True)),
+                ('acquired', models.DateTimeField(blank=True, null=True)),
+                ('expires', models.DateTimeField(blank=True, null=True)),
+                ('pending', models.JSONField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TaskRunRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(db_index=True, max_length=200)),
+                ('outcome', models.CharField(choices=[('skipped', 'Skipped'), ('queued', 'Queued'), ('delayed', 'Delayed'), ('replaced', 'Replaced'), ('recovered', 'Recovered stale lock')], max_length=10)),
+                ('wait_seconds', models.FloatField(blank=True, null=True)),
+                ('detail', models.CharField(blank=True, default='', max_length=255)),
+                ('created', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+        ),
+    ]
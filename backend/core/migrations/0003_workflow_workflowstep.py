@@ -0,0 +1,46 @@
+# Generated by Django 5.2.10 on 2026-10-19 14:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_tasklock_taskrunrecord'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Workflow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(db_index=True, max_length=100)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('success', 'Success'), ('partial', 'Partial failure'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('on_failure', models.CharField(choices=[('stop', 'Stop'), ('continue', 'Continue')], default='stop', max_length=10)),
+                ('created', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('finished', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='WorkflowStep',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stage', models.PositiveIntegerField()),
+                ('position', models.PositiveIntegerField()),
+                ('func', models.CharField(max_length=256)),
+                ('args', models.JSONField(blank=True, default=list)),
+                ('kwargs', models.JSONField(blank=True, default=dict)),
+                ('pass_results', models.BooleanField(default=False)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('queued', 'Queued'), ('running', 'Running'), ('success', 'Success'), ('failed', 'Failed'), ('skipped', 'Skipped')], default='pending', max_length=10)),
+                ('task_id', models.CharField(blank=True, db_index=True, default='', max_length=32)),
+                ('queued', models.DateTimeField(blank=True, null=True)),
+                ('started', models.DateTimeField(blank=True, null=True)),
+                ('stopped', models.DateTimeField(blank=True, null=True)),
+                ('workflow', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='steps', to='core.workflow')),
+            ],
+            options={
+                'ordering': ['workflow', 'stage', 'position'],
+            },
+        ),
+    ]
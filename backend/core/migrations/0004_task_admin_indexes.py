@@ -0,0 +1,40 @@
+from django.db import migrations
+
+# Indexes on django-q's tables backing the admin changelist ordering and
+# filters. On Postgres they are built CONCURRENTLY so a large task table
+# stays writable while the migration runs.
+INDEXES = [
+    ("core_task_success_stopped_idx", "django_q_task", "success, stopped, id"),
+    ("core_schedule_next_run_idx", "django_q_schedule", "next_run, id"),
+]
+
+
+def create_indexes(apps, schema_editor):
+    concurrently = (
+        "CONCURRENTLY " if schema_editor.connection.vendor == "postgresql" else ""
+    )
+    for name, table, columns in INDEXES:
+        schema_editor.execute(
+            f"CREATE INDEX {concurrently}IF NOT EXISTS {name} ON {table} ({columns})"
+        )
+
+
+def drop_indexes(apps, schema_editor):
+    concurrently = (
+        "CONCURRENTLY " if schema_editor.connection.vendor == "postgresql" else ""
+    )
+    for name, _, _ in INDEXES:
+        schema_editor.execute(f"DROP INDEX {concurrently}IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("core", "0003_workflow_workflowstep"),
+        ("django_q", "0018_task_success_index"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
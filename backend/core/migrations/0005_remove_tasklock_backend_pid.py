@@ -0,0 +1,17 @@
+# Generated by Django 5.2.10 on 2026-10-19 14:56
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_task_admin_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='tasklock',
+            name='backend_pid',
+        ),
+    ]
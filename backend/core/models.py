@@ -0,0 +1,181 @@
+from django.db import models
+
+# Create your models here.
+
+
+class ChangeEvent(models.Model):
+    """
+    Model representing a change pushed to Server-Sent Events subscribers.
+
+    Fields:
+    - kind (CharField): The event type, e.g. `schedule.saved` or
+      `task.failure`.
+    - object_id (CharField): The primary key of the changed object.
+    - payload (JSONField): A small summary of the changed object.
+    - created (DateTimeField): When the change was recorded.
+    """
+
+    kind = models.CharField(max_length=50)
+    object_id = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    created = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id}"
+
+
+class TaskLock(models.Model):
+    """
+    Model representing the lease held by a running guarded task.
+
+    Fields:
+    - key (CharField): The schedule name (or function path) being guarded.
+    - owner (CharField): Token of the run holding the lease, empty when free.
+    - acquired (DateTimeField): When the current run took the lease.
+    - expires (DateTimeField): When the lease lapses unless renewed.
+    - pending (JSONField): Arguments of the one run queued behind the
+      current one (queue policy).
+    """
+
+    key = models.CharField(max_length=200, unique=True)
+    owner = models.CharField(max_length=32, blank=True, default="")
+    acquired = models.DateTimeField(null=True, blank=True)
+    expires = models.DateTimeField(null=True, blank=True)
+    pending = models.JSONField(null=True, blank=True)
+
+    def __str__(self):
+        return self.key
+
+
+class TaskRunRecord(models.Model):
+    """
+    Model representing a guarded task run that did not start on time.
+
+    Fields:
+    - key (CharField): The schedule name (or function path) that was guarded.
+    - outcome (CharField): What happened to the run.
+    - wait_seconds (FloatField): How long a queued run waited to start.
+    - detail (CharField): Extra context, such as the owner that was busy.
+    - created (DateTimeField): When it happened.
+    """
+
+    SKIPPED = "skipped"
+    QUEUED = "queued"
+    DELAYED = "delayed"
+    REPLACED = "replaced"
+    RECOVERED = "recovered"
+    OUTCOMES = (
+        (SKIPPED, "Skipped"),
+        (QUEUED, "Queued"),
+        (DELAYED, "Delayed"),
+        (REPLACED, "Replaced"),
+        (RECOVERED, "Recovered stale lock"),
+    )
+
+    key = models.CharField(max_length=200, db_index=True)
+    outcome = models.CharField(max_length=10, choices=OUTCOMES)
+    wait_seconds = models.FloatField(null=True, blank=True)
+    detail = models.CharField(max_length=255, blank=True, default="")
+    created = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.key} {self.outcome}"
+
+
+class Workflow(models.Model):
+    """
+    Model representing a run of a task workflow (chains, groups and chords).
+
+    Fields:
+    - name (CharField): The workflow name.
+    - status (CharField): The state of the run.
+    - on_failure (CharField): Whether a failed step stops the workflow or
+      later stages still run.
+    - created (DateTimeField): When the run was started.
+    - finished (DateTimeField): When the last stage completed.
+    """
+
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCESS = "success"
+    PARTIAL = "partial"
+    FAILED = "failed"
+    STATUSES = (
+        (PENDING, "Pending"),
+        (RUNNING, "Running"),
+        (SUCCESS, "Success"),
+        (PARTIAL, "Partial failure"),
+        (FAILED, "Failed"),
+    )
+    STOP = "stop"
+    CONTINUE = "continue"
+    FAILURE_POLICIES = ((STOP, "Stop"), (CONTINUE, "Continue"))
+
+    name = models.CharField(max_length=100, db_index=True)
+    status = models.CharField(max_length=10, choices=STATUSES, default=PENDING)
+    on_failure = models.CharField(
+        max_length=10, choices=FAILURE_POLICIES, default=STOP
+    )
+    created = models.DateTimeField(auto_now_add=True, db_index=True)
+    finished = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.name} #{self.pk}"
+
+
+class WorkflowStep(models.Model):
+    """
+    Model representing one task of a Workflow. Steps sharing a stage run in
+    parallel; stages run one after another.
+
+    Fields:
+    - workflow (ForeignKey): The workflow the step belongs to.
+    - stage (PositiveIntegerField): The stage the step runs in.
+    - position (PositiveIntegerField): The step's place within its stage.
+    - func (CharField): The dotted path of the task function.
+    - args (JSONField): Positional arguments for the task.
+    - kwargs (JSONField): Keyword arguments for the task.
+    - pass_results (BooleanField): Whether the results of the previous
+      stage are passed as the first argument (chord callbacks).
+    - status (CharField): The state of the step.
+    - task_id (CharField): The django-q task id once enqueued.
+    - queued (DateTimeField): When the step was enqueued.
+    - started (DateTimeField): When a worker picked the step up.
+    - stopped (DateTimeField): When the step finished.
+    """
+
+    PENDING = "pending"
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCESS = "success"
+    FAILED = "failed"
+    SKIPPED = "skipped"
+    STATUSES = (
+        (PENDING, "Pending"),
+        (QUEUED, "Queued"),
+        (RUNNING, "Running"),
+        (SUCCESS, "Success"),
+        (FAILED, "Failed"),
+        (SKIPPED, "Skipped"),
+    )
+
+    workflow = models.ForeignKey(
+        Workflow, on_delete=models.CASCADE, related_name="steps"
+    )
+    stage = models.PositiveIntegerField()
+    position = models.PositiveIntegerField()
+    func = models.CharField(max_length=256)
+    args = models.JSONField(default=list, blank=True)
+    kwargs = models.JSONField(default=dict, blank=True)
+    pass_results = models.BooleanField(default=False)
+    status = models.CharField(max_length=10, choices=STATUSES, default=PENDING)
+    task_id = models.CharField(max_length=32, blank=True, default="", db_index=True)
+    queued = models.DateTimeField(null=True, blank=True)
+    started = models.DateTimeField(null=True, blank=True)
+    stopped = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["workflow", "stage", "position"]
+
+    def __str__(self):
+        return f"{self.workflow} {self.stage}.{self.position} {self.func}"
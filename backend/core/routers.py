@@ -0,0 +1,171 @@
+import logging
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+api_logger = logging.getLogger("api")
+db_logger = logging.getLogger("db")
+error_logger = logging.getLogger("error")
+task_logger = logging.getLogger("task")
+
+# A session missing on a lagging replica would log the user out
+PRIMARY_ONLY_APPS = {"sessions"}
+
+LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+"""
+
+
+class RoutingState:
+    """
+    Per request routing state. `replicas` allows reads to go to a replica;
+    `wrote` is set by the first write, after which reads stay on the
+    primary so the request sees its own changes.
+    """
+
+    def __init__(self, replicas: bool):
+        self.replicas = replicas
+        self.wrote = False
+
+
+_state: ContextVar[Optional[RoutingState]] = ContextVar("db_routing", default=None)
+
+# alias -> (checked at, lag in seconds or None when unreachable)
+_health: Dict[str, tuple] = {}
+
+
+@contextmanager
+def replica_reads(allowed: bool = True) -> Iterator[RoutingState]:
+    """
+    The function `replica_reads` lets reads inside the block go to a read
+    replica. Outside such a block (tasks, management commands, the shell)
+    every query uses the primary.
+
+    Args:
+        allowed (bool): False pins the block to the primary.
+
+    Yields:
+        RoutingState: the state of the block, e.g. to see if it wrote
+    """
+    state = RoutingState(allowed)
+    token = _state.set(state)
+    try:
+        yield state
+    finally:
+        _state.reset(token)
+
+
+@contextmanager
+def use_primary() -> Iterator[None]:
+    """
+    The function `use_primary` pins reads inside the block to the primary,
+    for code that must not see replica lag.
+    """
+    with replica_reads(False):
+        yield
+
+
+def replica_lag(alias: str) -> float:
+    """
+    The function `replica_lag` measures how far a replica is behind the
+    primary. A replica that has replayed everything it received counts as
+    current even if the primary has been idle for a while.
+
+    Args:
+        alias (str): The replica database alias.
+
+    Returns:
+        float: the replication lag in seconds (0 for non Postgres databases)
+    """
+    connection = connections[alias]
+    if connection.vendor != "postgresql":
+        return 0.0
+    with connection.cursor() as cursor:
+        cursor.execute(LAG_SQL)
+        return float(cursor.fetchone()[0] or 0)
+
+
+def replica_status() -> Dict[str, Dict[str, Optional[float]]]:
+    """
+    The function `replica_status` reports the last health check of every
+    configured replica.
+
+    Returns:
+        dict: per alias, whether it receives reads and its lag in seconds
+    """
+    healthy = healthy_replicas()
+    return {
+        alias: {"healthy": alias in healthy, "lag": _health[alias][1]}
+        for alias in settings.DATABASE_REPLICAS
+    }
+
+
+def healthy_replicas() -> List[str]:
+    """
+    The function `healthy_replicas` returns the replicas whose lag is below
+    `REPLICA_MAX_LAG`. Each replica is checked at most once every
+    `REPLICA_HEALTH_INTERVAL` seconds per process; unreachable replicas are
+    left out until a later check succeeds.
+
+    Returns:
+        List[str]: the aliases that may serve reads
+    """
+    now = time.monotonic()
+    healthy = []
+    for alias in settings.DATABASE_REPLICAS:
+        checked, lag = _health.get(alias, (None, None))
+        if checked is None or now - checked >= settings.REPLICA_HEALTH_INTERVAL:
+            try:
+                lag = replica_lag(alias)
+            except Exception as e:
+                db_logger.error(f"Replica {alias} health check failed")
+                error_logger.error(f"{str(e)}")
+                connections[alias].close()
+                lag = None
+            if lag is not None and lag > settings.REPLICA_MAX_LAG:
+                db_logger.warning(f"Replica {alias} is {lag:.1f}s behind")
+            _health[alias] = (now, lag)
+        if lag is not None and lag <= settings.REPLICA_MAX_LAG:
+            healthy.append(alias)
+    return healthy
+
+
+class ReplicaRouter:
+    """
+    Sends reads inside `replica_reads` blocks to a healthy replica from
+    `DATABASE_REPLICAS` and everything else to the primary. Reads stay on
+    the primary inside transactions, after the block has written, and for
+    the apps in `PRIMARY_ONLY_APPS`.
+    """
+
+    def db_for_read(self, model, **hints) -> Optional[str]:
+        state = _state.get()
+        if state is None or not state.replicas or state.wrote:
+            return None
+        if model._meta.app_label in PRIMARY_ONLY_APPS:
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        replicas = healthy_replicas()
+        return random.choice(replicas) if replicas else None
+
+    def db_for_write(self, model, **hints) -> Optional[str]:
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints) -> Optional[bool]:
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
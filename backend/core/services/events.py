@@ -0,0 +1,295 @@
+import asyncio
+import logging
+import select
+import threading
+import time
+from collections import deque
+from datetime import timedelta
+from typing import Any, Callable, Dict, List, Set, Tuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from core.models import ChangeEvent
+
+api_logger = logging.getLogger("api")
+db_logger = logging.getLogger("db")
+error_logger = logging.getLogger("error")
+task_logger = logging.getLogger("task")
+
+
+class EventHub:
+    """
+    Process wide fan-out of ChangeEvent rows to Server-Sent Events streams.
+
+    A single background thread per process reads new events, so the database
+    sees one query per tick however many clients are connected. On Postgres
+    the thread blocks on `LISTEN` and is woken by the `NOTIFY` sent from
+    core.signals; elsewhere it polls every `EVENTS_POLL_INTERVAL` seconds.
+    The thread is started by the first subscriber, so it is created after
+    gunicorn forks its workers.
+
+    Streams on an ASGI server use `await_events`, which waits on the event
+    loop instead of blocking a thread per client.
+
+    Event ids are handed out on insert but rows become visible on commit,
+    so a missing id below a visible one belongs to a transaction still in
+    progress. Events are only delivered up to the first such gap, so
+    clients can keep resuming from the highest id they saw; a gap still
+    open after `EVENTS_GAP_TIMEOUT` seconds is taken as a rollback and
+    skipped.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._buffer = deque()
+        self._floor = 0
+        self._last_id = 0
+        # first missing id -> monotonic time the gap was first seen
+        self._gaps: Dict[int, float] = {}
+        self._subscribers = 0
+        self._thread = None
+        self._waiters: Set[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = set()
+
+    def subscribe(self) -> None:
+        """
+        The function `subscribe` registers a stream and starts the reader
+        thread if this process does not have one yet.
+        """
+        with self._condition:
+            if self._subscribers == 0:
+                self._last_id = self._floor = self.settled_id()
+                self._buffer.clear()
+                self._gaps.clear()
+            self._subscribers += 1
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="event-hub", daemon=True
+                )
+                self._thread.start()
+
+    def unsubscribe(self) -> None:
+        """
+        The function `unsubscribe` removes a stream registered with
+        `subscribe`.
+        """
+        with self._condition:
+            self._subscribers = max(self._subscribers - 1, 0)
+
+    @property
+    def subscribers(self) -> int:
+        """
+        The property `subscribers` is the number of open streams in this
+        process.
+        """
+        return self._subscribers
+
+    @property
+    def last_id(self) -> int:
+        """
+        The property `last_id` is the id of the newest event delivered by
+        this process, where new streams start.
+        """
+        return self._last_id
+
+    def settled_id(self) -> int:
+        """
+        The function `settled_id` returns the id of the newest event recorded
+        more than `EVENTS_GAP_TIMEOUT` seconds ago. Newer events may still sit
+        behind uncommitted ids, so the reader starts from here and delivers
+        them once their gaps are filled.
+
+        Returns:
+            int: the newest settled event id, or 0 when there are none
+        """
+        settled = ChangeEvent.objects.filter(
+            created__lte=timezone.now() - timedelta(seconds=settings.EVENTS_GAP_TIMEOUT)
+        )
+        return settled.order_by("-id").values_list("id", flat=True).first() or 0
+
+    def wait(self, after_id: int, timeout: float) -> List[ChangeEvent]:
+        """
+        The function `wait` returns the events newer than `after_id`, blocking
+        up to `timeout` seconds for one to arrive. Clients resuming from
+        before what this process has buffered are served from the database.
+
+        Args:
+            after_id (int): The id of the last event the client has seen.
+            timeout (float): Seconds to wait when nothing is pending.
+
+        Returns:
+            List[ChangeEvent]: the pending events, oldest first
+        """
+        if after_id < self._floor:
+            backlog = self.backlog(after_id)
+            if backlog:
+                return backlog
+            after_id = self._floor
+
+        with self._condition:
+            events = self._buffered(after_id)
+            if not events:
+                self._condition.wait(timeout)
+                events = self._buffered(after_id)
+        return events
+
+    async def asubscribe(self) -> None:
+        """
+        The function `asubscribe` is `subscribe` for streams running on an
+        event loop; the first subscriber reads the newest id in a thread.
+        """
+        await _in_thread(self.subscribe)
+
+    async def await_events(self, after_id: int, timeout: float) -> List[ChangeEvent]:
+        """
+        The function `await_events` is the asyncio counterpart of `wait`. The
+        reader thread wakes waiting coroutines through their event loop, so
+        an idle stream holds no thread.
+
+        Args:
+            after_id (int): The id of the last event the client has seen.
+            timeout (float): Seconds to wait when nothing is pending.
+
+        Returns:
+            List[ChangeEvent]: the pending events, oldest first
+        """
+        if after_id < self._floor:
+            backlog = await _in_thread(self.backlog, after_id)
+            if backlog:
+                return backlog
+            after_id = self._floor
+
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._condition:
+            events = self._buffered(after_id)
+            if events:
+                return events
+            self._waiters.add(waiter)
+        try:
+            await asyncio.wait_for(waiter[1].wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with self._condition:
+                self._waiters.discard(waiter)
+        with self._condition:
+            return self._buffered(after_id)
+
+    def backlog(self, after_id: int) -> List[ChangeEvent]:
+        """
+        The function `backlog` reads the stored events after `after_id` for
+        clients resuming from before what this process has buffered. Events
+        past `last_id` are left to the buffer, which waits for gaps.
+
+        Args:
+            after_id (int): The id of the last event the client has seen.
+
+        Returns:
+            List[ChangeEvent]: up to `EVENTS_BUFFER_SIZE` events, oldest first
+        """
+        events = ChangeEvent.objects.filter(id__gt=after_id, id__lte=self._last_id)
+        return list(events.order_by("id")[: settings.EVENTS_BUFFER_SIZE])
+
+    def _buffered(self, after_id: int) -> List[ChangeEvent]:
+        return [event for event in self._buffer if event.id > after_id]
+
+    def _run(self) -> None:
+        listener = None
+        while True:
+            try:
+                if listener is None:
+                    listener = self._listen()
+                self._sleep(listener)
+                with self._condition:
+                    idle = self._subscribers == 0
+                if not idle:
+                    self._fetch()
+            except Exception as e:
+                db_logger.error("Event hub read failed")
+                error_logger.error(f"{str(e)}")
+                listener = None
+                connection.close()
+                time.sleep(settings.EVENTS_POLL_INTERVAL)
+
+    def _listen(self) -> Any:
+        # Only psycopg2 exposes poll()/notifies in the shape used below
+        if connection.vendor != "postgresql":
+            return False
+        connection.ensure_connection()
+        raw = connection.connection
+        if not hasattr(raw, "poll") or not hasattr(raw, "notifies"):
+            return False
+        with connection.cursor() as cursor:
+            cursor.execute(f'LISTEN "{settings.EVENTS_CHANNEL}"')
+        return raw
+
+    def _sleep(self, listener) -> None:
+        if not listener:
+            time.sleep(settings.EVENTS_POLL_INTERVAL)
+            return
+        readable, _, _ = select.select(
+            [listener], [], [], settings.EVENTS_POLL_INTERVAL
+        )
+        if readable:
+            listener.poll()
+            listener.notifies.clear()
+
+    def _fetch(self) -> None:
+        events = list(
+            ChangeEvent.objects.filter(id__gt=self._last_id).order_by("id")[
+                : settings.EVENTS_BUFFER_SIZE
+            ]
+        )
+        events = self._contiguous(events)
+        if not events:
+            return
+        with self._condition:
+            for event in events:
+                self._buffer.append(event)
+            while len(self._buffer) > settings.EVENTS_BUFFER_SIZE:
+                self._floor = self._buffer.popleft().id
+            self._last_id = events[-1].id
+            self._condition.notify_all()
+            for loop, event in self._waiters:
+                if not loop.is_closed():
+                    loop.call_soon_threadsafe(event.set)
+
+    def _contiguous(self, events: List[ChangeEvent]) -> List[ChangeEvent]:
+        # The events up to the first gap that may still be filled by a commit
+        now = time.monotonic()
+        ready = []
+        expected = self._last_id + 1
+        for event in events:
+            # Nothing delivered yet: the first visible id sets the baseline
+            if event.id > expected and self._last_id:
+                seen = self._gaps.setdefault(expected, now)
+                if now - seen < settings.EVENTS_GAP_TIMEOUT:
+                    break
+                db_logger.warning(
+                    f"Event ids {expected}-{event.id - 1} never committed, skipped"
+                )
+            ready.append(event)
+            expected = event.id + 1
+        if ready:
+            self._gaps = {
+                start: seen
+                for start, seen in self._gaps.items()
+                if start > ready[-1].id
+            }
+        return ready
+
+
+async def _in_thread(func: Callable, *args) -> Any:
+    # Off the event loop, on a pooled thread whose connection is not reused
+    def call():
+        try:
+            return func(*args)
+        finally:
+            connection.close()
+
+    return await sync_to_async(call, thread_sensitive=False)()
+
+
+hub = EventHub()
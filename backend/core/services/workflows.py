@@ -0,0 +1,344 @@
+import logging
+import re
+from importlib import import_module
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from django_q.models import Task
+from django_q.tasks import async_task
+
+from core.models import Workflow, WorkflowStep
+
+api_logger = logging.getLogger("api")
+db_logger = logging.getLogger("db")
+error_logger = logging.getLogger("error")
+task_logger = logging.getLogger("task")
+
+HOOK = "core.services.workflows.step_finished"
+DEFINITIONS = "core.workflows"
+
+# Task names carry the step id so hooks never depend on when task_id is saved
+_TASK_NAME = re.compile(r"^workflow-(?P<workflow>\d+)-step-(?P<step>\d+)$")
+
+_registry: Dict[str, Dict[str, Any]] = {}
+
+Step = Dict[str, Any]
+Stage = List[Step]
+
+
+def step(func: Union[str, Callable], *args, **kwargs) -> Step:
+    """
+    The function `step` describes a single task of a workflow.
+
+    Args:
+        func (str | Callable): The task function or its dotted path.
+        *args: Positional arguments for the task.
+        **kwargs: Keyword arguments for the task.
+
+    Returns:
+        Step: the step definition
+    """
+    if callable(func):
+        func = f"{func.__module__}.{func.__qualname__}"
+    return {"func": func, "args": list(args), "kwargs": kwargs, "pass_results": False}
+
+
+def group(*steps: Step) -> Stage:
+    """
+    The function `group` runs steps in parallel on the available workers.
+
+    Args:
+        *steps (Step): The steps to fan out.
+
+    Returns:
+        Stage: the group as one workflow stage
+    """
+    return list(steps)
+
+
+def chain(*parts: Union[Step, Stage, List[Stage]]) -> List[Stage]:
+    """
+    The function `chain` runs steps, groups or other chains one after
+    another. Each part starts once everything in the previous one finished.
+
+    Args:
+        *parts: Steps, groups or chains, in order.
+
+    Returns:
+        List[Stage]: the workflow stages
+    """
+    stages = []
+    for part in parts:
+        if isinstance(part, dict):
+            stages.append([part])
+        elif part and isinstance(part[0], dict):
+            stages.append(part)
+        else:
+            stages.extend(part)
+    return stages
+
+
+def chord(header: Stage, callback: Step) -> List[Stage]:
+    """
+    The function `chord` runs a group and then a callback that receives the
+    list of the group's results as its first argument.
+
+    Args:
+        header (Stage): The group to run in parallel.
+        callback (Step): The join step.
+
+    Returns:
+        List[Stage]: the workflow stages
+    """
+    return chain(header, {**callback, "pass_results": True})
+
+
+def register(name: str, on_failure: str = Workflow.STOP) -> Callable:
+    """
+    The function `register` names a function returning workflow stages so it
+    can be started by name, e.g. from a schedule through
+    `core.tasks.run_workflow`.
+
+    Args:
+        name (str): The workflow name.
+        on_failure (str): stop or continue, see `start_workflow`.
+
+    Returns:
+        Callable: the decorator
+    """
+
+    def decorator(build: Callable[[], List[Stage]]) -> Callable:
+        _registry[name] = {"build": build, "on_failure": on_failure}
+        return build
+
+    return decorator
+
+
+def start_named(name: str) -> Workflow:
+    """
+    The function `start_named` starts a workflow registered in
+    `core.workflows`.
+
+    Args:
+        name (str): The registered workflow name.
+
+    Returns:
+        Workflow: the new run
+    """
+    import_module(DEFINITIONS)
+    if name not in _registry:
+        raise KeyError(f"Unknown workflow: {name}")
+    definition = _registry[name]
+    return start_workflow(name, definition["build"](), definition["on_failure"])
+
+
+def start_workflow(
+    name: str, stages: List[Stage], on_failure: str = Workflow.STOP
+) -> Workflow:
+    """
+    The function `start_workflow` stores a workflow run and enqueues its
+    first stage once the surrounding transaction commits.
+
+    When a step fails, `on_failure` decides what happens after its stage
+    completes: stop skips the remaining stages and marks the run failed,
+    continue runs them anyway and marks the run as a partial failure.
+    Callbacks of a chord receive None for failed steps.
+
+    Args:
+        name (str): The workflow name.
+        stages (List[Stage]): The stages, as built by `chain` or `chord`.
+        on_failure (str): stop or continue.
+
+    Returns:
+        Workflow: the new run
+    """
+    if not stages or not all(stages):
+        raise ValueError("A workflow needs at least one step in every stage")
+
+    with transaction.atomic():
+        workflow = Workflow.objects.create(
+            name=name, status=Workflow.RUNNING, on_failure=on_failure
+        )
+        WorkflowStep.objects.bulk_create(
+            WorkflowStep(
+                workflow=workflow,
+                stage=index,
+                position=position,
+                func=definition["func"],
+                args=definition["args"],
+                kwargs=definition["kwargs"],
+                pass_results=definition["pass_results"],
+            )
+            for index, stage in enumerate(stages)
+            for position, definition in enumerate(stage)
+        )
+        transaction.on_commit(lambda: _enqueue_stage(workflow.pk, 0))
+
+    task_logger.info(f"Workflow {workflow} started with {len(stages)} stages")
+    return workflow
+
+
+def active_run(name: str) -> Optional[Workflow]:
+    """
+    The function `active_run` finds a run of `name` that is still in
+    progress. django-q swallows errors raised by hooks and a lost task
+    leaves its step queued or running, so a run only counts as in progress
+    for one Q_CLUSTER timeout per stage after it was created. Older runs are
+    marked failed, their unfinished steps failed and their pending steps
+    skipped.
+
+    Args:
+        name (str): The workflow name.
+
+    Returns:
+        Workflow: the run in progress, or None
+    """
+    stage_timeout = settings.Q_CLUSTER["timeout"]
+    now = timezone.now()
+    for candidate in Workflow.objects.filter(name=name, status=Workflow.RUNNING):
+        stages = (candidate.steps.aggregate(last=Max("stage"))["last"] or 0) + 1
+        if (now - candidate.created).total_seconds() < stages * stage_timeout:
+            return candidate
+
+        with transaction.atomic():
+            workflow = Workflow.objects.select_for_update().get(pk=candidate.pk)
+            if workflow.status != Workflow.RUNNING:
+                continue
+            steps = WorkflowStep.objects.filter(workflow=workflow)
+            steps.filter(status__in=(WorkflowStep.QUEUED, WorkflowStep.RUNNING)).update(
+                status=WorkflowStep.FAILED, stopped=now
+            )
+            steps.filter(status=WorkflowStep.PENDING).update(
+                status=WorkflowStep.SKIPPED
+            )
+            task_logger.warning(
+                f"Workflow {workflow} still running after {stages} stage timeouts"
+            )
+            _finish(workflow, Workflow.FAILED)
+    return None
+
+
+def step_started(task: Dict[str, Any]) -> None:
+    """
+    The function `step_started` records when a worker picks up a workflow
+    step. It is connected to the django-q `pre_execute` signal in
+    core.signals.
+
+    Args:
+        task (dict): The django-q task package.
+    """
+    if task.get("hook") != HOOK:
+        return
+    match = _TASK_NAME.match(task.get("name") or "")
+    if match:
+        WorkflowStep.objects.filter(
+            pk=match["step"], status=WorkflowStep.QUEUED
+        ).update(status=WorkflowStep.RUNNING, started=timezone.now())
+
+
+def step_finished(task: Task) -> None:
+    """
+    The function `step_finished` is the django-q hook of every workflow
+    step. It records the outcome and, once the whole stage is done, starts
+    the next stage or finishes the workflow.
+
+    Args:
+        task (Task): The finished django-q task.
+    """
+    match = _TASK_NAME.match(task.name or "")
+    if not match:
+        return
+
+    with transaction.atomic():
+        # Steps of one stage finish concurrently; the workflow row serializes them
+        workflow = Workflow.objects.select_for_update().get(pk=match["workflow"])
+        current = WorkflowStep.objects.get(pk=match["step"])
+        if current.status not in (WorkflowStep.QUEUED, WorkflowStep.RUNNING):
+            return
+
+        current.status = WorkflowStep.SUCCESS if task.success else WorkflowStep.FAILED
+        current.task_id = task.id
+        current.started = current.started or task.started
+        current.stopped = task.stopped
+        current.save()
+        if not task.success:
+            task_logger.warning(f"Workflow {workflow} step {current} failed")
+
+        _advance(workflow, current.stage)
+
+
+def _advance(workflow: Workflow, stage: int) -> None:
+    # Called with the workflow row locked, after a step of `stage` ended
+    steps = WorkflowStep.objects.filter(workflow=workflow)
+    current = steps.filter(stage=stage)
+    if current.exclude(status__in=(WorkflowStep.SUCCESS, WorkflowStep.FAILED)).exists():
+        return
+
+    failed = current.filter(status=WorkflowStep.FAILED).exists()
+    if failed and workflow.on_failure == Workflow.STOP:
+        steps.filter(status=WorkflowStep.PENDING).update(status=WorkflowStep.SKIPPED)
+        _finish(workflow, Workflow.FAILED)
+    elif steps.filter(stage=stage + 1).exists():
+        transaction.on_commit(lambda: _enqueue_stage(workflow.pk, stage + 1))
+    elif not steps.filter(status=WorkflowStep.FAILED).exists():
+        _finish(workflow, Workflow.SUCCESS)
+    elif steps.filter(status=WorkflowStep.SUCCESS).exists():
+        _finish(workflow, Workflow.PARTIAL)
+    else:
+        _finish(workflow, Workflow.FAILED)
+
+
+def _finish(workflow: Workflow, status: str) -> None:
+    workflow.status = status
+    workflow.finished = timezone.now()
+    workflow.save(update_fields=["status", "finished"])
+    elapsed = (workflow.finished - workflow.created).total_seconds()
+    task_logger.info(f"Workflow {workflow} finished: {status} in {elapsed:.1f}s")
+
+
+def _enqueue_stage(workflow_id: int, stage: int) -> None:
+    workflow = Workflow.objects.get(pk=workflow_id)
+    steps = list(workflow.steps.filter(stage=stage, status=WorkflowStep.PENDING))
+    results = None
+    if any(s.pass_results for s in steps):
+        results = _stage_results(workflow, stage - 1)
+
+    for s in steps:
+        args = [results, *s.args] if s.pass_results else s.args
+        s.status = WorkflowStep.QUEUED
+        s.queued = timezone.now()
+        s.save(update_fields=["status", "queued"])
+        try:
+            s.task_id = async_task(
+                s.func,
+                *args,
+                hook=HOOK,
+                group=f"workflow-{workflow.pk}",
+                task_name=f"workflow-{workflow.pk}-step-{s.pk}",
+                **s.kwargs,
+            )
+        except Exception as e:
+            task_logger.error(f"Workflow {workflow} could not enqueue {s}")
+            error_logger.error(f"{str(e)}")
+            with transaction.atomic():
+                locked = Workflow.objects.select_for_update().get(pk=workflow.pk)
+                WorkflowStep.objects.filter(pk=s.pk).update(
+                    status=WorkflowStep.FAILED, stopped=timezone.now()
+                )
+                _advance(locked, stage)
+            continue
+        # Under sync mode the hook has already run; only fill in the id
+        WorkflowStep.objects.filter(pk=s.pk).update(task_id=s.task_id)
+
+
+def _stage_results(workflow: Workflow, stage: int) -> List[Any]:
+    previous = list(workflow.steps.filter(stage=stage))
+    found = dict(
+        Task.objects.filter(
+            id__in=[s.task_id for s in previous if s.task_id], success=True
+        ).values_list("id", "result")
+    )
+    return [found.get(s.task_id) for s in previous]
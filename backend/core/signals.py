@@ -0,0 +1,98 @@
+import logging
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django_q.models import Schedule, Task
+from django_q.signals import pre_execute
+
+from core.models import ChangeEvent
+from core.services import workflows
+from options.models import Version
+
+api_logger = logging.getLogger("api")
+db_logger = logging.getLogger("db")
+error_logger = logging.getLogger("error")
+task_logger = logging.getLogger("task")
+
+
+def record_event(kind: str, object_id, payload: dict) -> None:
+    """
+    The function `record_event` stores a change for Server-Sent Events
+    subscribers and, on Postgres, wakes the listening processes with
+    `NOTIFY` once the surrounding transaction commits.
+
+    Args:
+        kind (str): The event type.
+        object_id: The primary key of the changed object.
+        payload (dict): A JSON serializable summary of the change.
+    """
+    try:
+        with transaction.atomic():
+            event = ChangeEvent.objects.create(
+                kind=kind, object_id=str(object_id), payload=payload
+            )
+    except Exception as e:
+        db_logger.error(f"Change event {kind} not recorded")
+        error_logger.error(f"{str(e)}")
+        return
+
+    if connection.vendor == "postgresql":
+        transaction.on_commit(lambda: _notify(event.pk))
+
+
+def _notify(event_id: int) -> None:
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT pg_notify(%s, %s)", [settings.EVENTS_CHANNEL, str(event_id)]
+        )
+
+
+def _schedule_payload(instance: Schedule) -> dict:
+    return {
+        "id": instance.pk,
+        "name": instance.name,
+        "func": instance.func,
+        "next_run": instance.next_run.isoformat() if instance.next_run else None,
+    }
+
+
+@receiver(post_save, sender=Schedule)
+def schedule_saved(sender, instance, **kwargs):
+    record_event("schedule.saved", instance.pk, _schedule_payload(instance))
+
+
+@receiver(post_delete, sender=Schedule)
+def schedule_deleted(sender, instance, **kwargs):
+    record_event("schedule.deleted", instance.pk, _schedule_payload(instance))
+
+
+@receiver(post_save, sender=Task)
+def task_saved(sender, instance, **kwargs):
+    record_event(
+        "task.success" if instance.success else "task.failure",
+        instance.pk,
+        {
+            "id": instance.pk,
+            "name": instance.name,
+            "func": instance.func,
+            "group": instance.group,
+            "success": instance.success,
+            "stopped": instance.stopped.isoformat() if instance.stopped else None,
+        },
+    )
+
+
+@receiver(post_save, sender=Version)
+def version_saved(sender, instance, **kwargs):
+    record_event(
+        "version.updated",
+        instance.pk,
+        {"id": instance.pk, "version_number": instance.version_number},
+    )
+
+
+@receiver(pre_execute)
+def task_starting(sender, func, task, **kwargs):
+    workflows.step_started(task)
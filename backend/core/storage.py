@@ -0,0 +1,138 @@
+import gzip
+import logging
+import os
+from typing import Dict, Iterator, Optional, Set, Tuple
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - gzip only
+    brotli = None
+
+api_logger = logging.getLogger("api")
+db_logger = logging.getLogger("db")
+error_logger = logging.getLogger("error")
+task_logger = logging.getLogger("task")
+
+COMPRESSIBLE_EXTENSIONS = (
+    ".css",
+    ".js",
+    ".mjs",
+    ".map",
+    ".json",
+    ".svg",
+    ".html",
+    ".txt",
+    ".xml",
+    ".ico",
+    ".ttf",
+    ".eot",
+    ".otf",
+)
+
+# Images jazzmin links to that are copied into the static volume by hand
+JAZZMIN_UNCOLLECTED_KEYS = ("site_logo", "login_logo", "login_logo_dark", "site_icon")
+
+
+def compress(data: bytes) -> Dict[str, bytes]:
+    """
+    The function `compress` builds the precompressed variants of a file.
+    gzip output is reproducible (no name or timestamp in the header); brotli
+    is only produced when the optional `brotli` package is installed.
+
+    Args:
+        data (bytes): The file contents.
+
+    Returns:
+        dict: the variant suffix (".gz", ".br") mapped to its contents
+    """
+    variants = {".gz": gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants[".br"] = brotli.compress(data, quality=settings.STATIC_BROTLI_QUALITY)
+    return variants
+
+
+def is_compressible(name: str) -> bool:
+    """
+    The function `is_compressible` tells whether a static file is text-like
+    enough to be worth precompressing.
+
+    Args:
+        name (str): The file name.
+
+    Returns:
+        bool: True for the extensions in `COMPRESSIBLE_EXTENSIONS`
+    """
+    return name.lower().endswith(COMPRESSIBLE_EXTENSIONS)
+
+
+def uncollected_files() -> Set[str]:
+    """
+    The function `uncollected_files` lists the static files that are served
+    without being collected: the images configured in `JAZZMIN_SETTINGS`
+    under `JAZZMIN_UNCOLLECTED_KEYS`.
+
+    Returns:
+        set: the static file names
+    """
+    jazzmin = getattr(settings, "JAZZMIN_SETTINGS", {})
+    return {jazzmin[key] for key in JAZZMIN_UNCOLLECTED_KEYS if jazzmin.get(key)}
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    Static files storage that fingerprints files into `staticfiles.json`
+    (ManifestStaticFilesStorage) and then writes `.gz` and `.br` siblings of
+    every compressible fingerprinted file for nginx `gzip_static`. Files
+    below `STATIC_COMPRESS_MIN_SIZE` bytes are left alone, and a variant is
+    only kept if it is under `STATIC_COMPRESS_MIN_RATIO` of the original.
+
+    Fingerprinted names change with their content, so variants left by an
+    earlier collectstatic into the same volume are reused as they are.
+    """
+
+    def post_process(
+        self, paths: Dict[str, Tuple], dry_run: bool = False, **options
+    ) -> Iterator[Tuple[str, Optional[str], bool]]:
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+
+        written = 0
+        for name in sorted(set(self.hashed_files.values())):
+            if is_compressible(name) and self.exists(name):
+                written += self._write_variants(name)
+        task_logger.info(f"collectstatic wrote {written} precompressed files")
+
+    def stored_name(self, name: str) -> str:
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            # jazzmin's site icon and logos are copied into the volume by
+            # hand and never collected: link them by their plain name. Any
+            # other missing entry is a real error.
+            if name not in uncollected_files():
+                raise
+            return name
+
+    def _write_variants(self, name: str) -> int:
+        suffixes = (".gz", ".br") if brotli is not None else (".gz",)
+        if all(self.exists(name + suffix) for suffix in suffixes):
+            return 0
+        with self.open(name) as original:
+            data = original.read()
+        if len(data) < settings.STATIC_COMPRESS_MIN_SIZE:
+            return 0
+        written = 0
+        for suffix, content in compress(data).items():
+            path = self.path(name + suffix)
+            if len(content) >= len(data) * settings.STATIC_COMPRESS_MIN_RATIO:
+                if os.path.exists(path):
+                    os.remove(path)
+                continue
+            with open(path, "wb") as variant:
+                variant.write(content)
+            written += 1
+        return written
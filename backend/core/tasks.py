@@ -1,2 +1,186 @@
+from datetime import timedelta
+from django.apps import apps
+from django.conf import settings
+from django.utils import timezone
+from django_q.models import Failure, Task
+from django_q.tasks import async_task
+from core.models import ChangeEvent, TaskRunRecord
+from core.services import backup, workflows
+from core.utils.locks import guarded
+import logging
+
+api_logger = logging.getLogger("api")
+db_logger = logging.getLogger("db")
+error_logger = logging.getLogger("error")
+task_logger = logging.getLogger("task")
+
+
 def test_task():
     pass
+
+
+@guarded("skip")
+def purge_change_events():
+    """
+    The function `purge_change_events` deletes Server-Sent Events changes
+    older than `EVENTS_RETENTION_HOURS`.
+
+    Returns:
+        deleted (int): the number of events removed
+    """
+    cutoff = timezone.now() - timedelta(hours=settings.EVENTS_RETENTION_HOURS)
+    deleted, _ = ChangeEvent.objects.filter(created__lt=cutoff).delete()
+    task_logger.info(f"Purged {deleted} change events")
+    return deleted
+
+
+@guarded("skip")
+def backup_database():
+    """
+    The function `backup_database` writes a compressed, checksummed dump of
+    the default database to the backup volume.
+
+    Returns:
+        metrics (dict): file name, size, sha256 and duration of the backup
+    """
+    return backup.backup_database()
+
+
+@guarded("skip")
+def backup_media():
+    """
+    The function `backup_media` takes an incremental snapshot of the media
+    files on the backup volume.
+
+    Returns:
+        metrics (dict): manifest name, file counts, bytes copied and duration
+    """
+    return backup.backup_media()
+
+
+@guarded("skip")
+def verify_database_backup():
+    """
+    The function `verify_database_backup` restores the newest database
+    backup into a throwaway target to prove it is usable.
+
+    Returns:
+        metrics (dict): file name, tables restored and duration
+    """
+    return backup.verify_database_backup()
+
+
+def run_workflow(name):
+    """
+    The function `run_workflow` starts a workflow registered in
+    core.workflows, unless a run of it is still in progress. Runs stuck
+    for longer than their stages can take are failed and do not block it,
+    see `workflows.active_run`.
+
+    Args:
+        name (str): The registered workflow name.
+
+    Returns:
+        workflow_id (int): the id of the new run, or None if skipped
+    """
+    running = workflows.active_run(name)
+    if running:
+        TaskRunRecord.objects.create(
+            key=name, outcome=TaskRunRecord.SKIPPED, detail=f"busy with {running}"
+        )
+        task_logger.info(f"{name}: skipped, {running} still running")
+        return None
+    return workflows.start_named(name).pk
+
+
+def summarize_backups(results):
+    """
+    The function `summarize_backups` joins the results of the parallel
+    backup steps of the nightly backup workflow.
+
+    Args:
+        results (list): The metrics returned by each backup step.
+
+    Returns:
+        summary (dict): the step metrics and their total size and duration
+    """
+    completed = [r for r in results if r]
+    summary = {
+        "steps": completed,
+        "failed": len(results) - len(completed),
+        "bytes": sum(r.get("bytes", 0) for r in completed),
+        "seconds": sum(r.get("seconds", 0) for r in completed),
+    }
+    task_logger.info(
+        f"Nightly backup: {len(completed)} of {len(results)} steps, "
+        f"{summary['bytes']} bytes in {summary['seconds']:.1f}s"
+    )
+    return summary
+
+
+def requeue_tasks(model, pks):
+    """
+    The function `requeue_tasks` submits django-q task results back to the
+    queue in batches of `ADMIN_TASK_BATCH_SIZE`. Requeued failures are
+    removed, as the django-q admin does.
+
+    Args:
+        model (str): The label of the task model, e.g. "django_q.Failure".
+        pks (list): The ids of the selected results.
+
+    Returns:
+        requeued (int): the number of tasks submitted
+    """
+    model = apps.get_model(model)
+    requeued = 0
+    for batch in _batches(pks):
+        results = list(model.objects.filter(pk__in=batch))
+        for task in results:
+            async_task(
+                task.func,
+                *task.args or (),
+                hook=task.hook,
+                group=task.group,
+                cluster=task.cluster,
+                **task.kwargs or {},
+            )
+        if model is Failure:
+            Task.objects.filter(pk__in=[task.pk for task in results]).delete()
+        requeued += len(results)
+    task_logger.info(f"Requeued {requeued} {model._meta.verbose_name_plural}")
+    return requeued
+
+
+def purge_tasks(model, pks, before):
+    """
+    The function `purge_tasks` deletes django-q task results that stopped
+    before `before`, in batches of `ADMIN_TASK_BATCH_SIZE` so no single
+    statement holds long locks on the task table.
+
+    Args:
+        model (str): The label of the task model, e.g. "django_q.Success".
+        pks (list): The ids of the selected results.
+        before (datetime): Results that stopped earlier are deleted.
+
+    Returns:
+        deleted (int): the number of results removed
+    """
+    model = apps.get_model(model)
+    deleted = 0
+    for batch in _batches(pks):
+        expired = model.objects.filter(pk__in=batch, stopped__lt=before)
+        count, _ = Task.objects.filter(
+            pk__in=list(expired.values_list("pk", flat=True))
+        ).delete()
+        deleted += count
+    task_logger.info(
+        f"Purged {deleted} {model._meta.verbose_name_plural} "
+        f"stopped before {before:%Y-%m-%d %H:%M}"
+    )
+    return deleted
+
+
+def _batches(pks):
+    size = settings.ADMIN_TASK_BATCH_SIZE
+    for start in range(0, len(pks), size):
+        yield pks[start : start + size]
@@ -0,0 +1,176 @@
+import gzip
+import hashlib
+import itertools
+import shutil
+import sqlite3
+from datetime import timedelta
+from pathlib import Path
+
+import pytest
+from django.db import connections
+from django.utils import timezone
+
+from core.services import backup
+
+pytestmark = [pytest.mark.service, pytest.mark.django_db]
+
+
+@pytest.mark.parametrize("target", ["primary", "scratch"])
+def test_verify_refuses_a_target_that_may_be_a_real_database(settings, mocker, target):
+    db = connections["default"].settings_dict
+    settings.BACKUP_VERIFY_DATABASE = db["NAME"] if target == "primary" else target
+    run = mocker.patch.object(backup.subprocess, "run")
+
+    with pytest.raises(backup.BackupError):
+        backup._verify_pg_backup(Path("default-20260101-000000.pgdump.zst"))
+
+    run.assert_not_called()
+
+
+def test_verify_target_must_differ_even_with_the_suffix(settings, mocker):
+    mocker.patch.dict(connections["default"].settings_dict, NAME="live_verify")
+    settings.BACKUP_VERIFY_DATABASE = "live_verify"
+    run = mocker.patch.object(backup.subprocess, "run")
+
+    with pytest.raises(backup.BackupError):
+        backup._verify_pg_backup(Path("default-20260101-000000.pgdump.zst"))
+
+    run.assert_not_called()
+
+
+# Writes more to stderr than a pipe buffer holds before touching stdin
+CHATTY = "head -c 200000 /dev/zero | tr '\\0' x >&2; "
+
+
+def test_compressor_stderr_cannot_fill_a_pipe(tmp_path):
+    target = tmp_path / "out"
+    with open(__file__, "rb") as source:
+        writer = backup._compress_stream(source, ["sh", "-c", CHATTY + "cat"], target)
+
+    assert target.read_bytes() == Path(__file__).read_bytes()
+    assert writer.size == target.stat().st_size
+
+
+def test_compressor_failure_reports_its_stderr(tmp_path):
+    with open(__file__, "rb") as source:
+        with pytest.raises(backup.BackupError) as error:
+            backup._compress_stream(
+                source, ["sh", "-c", CHATTY + "exit 3"], tmp_path / "out"
+            )
+
+    assert str(error.value) == "x" * 200000
+
+
+@pytest.fixture
+def location(settings, tmp_path):
+    settings.DBBACKUP_STORAGE_OPTIONS = {"location": str(tmp_path / "backups")}
+    settings.BACKUP_COMPRESSOR = "gzip"
+    settings.DBBACKUP_CLEANUP_KEEP = 2
+    settings.DBBACKUP_CLEANUP_KEEP_MEDIA = 2
+    return tmp_path / "backups"
+
+
+@pytest.fixture
+def clock(mocker):
+    # One second per call, so every run gets its own file name
+    start = timezone.now()
+    ticks = itertools.count()
+    mocker.patch.object(
+        backup.timezone,
+        "now",
+        side_effect=lambda: start + timedelta(seconds=next(ticks)),
+    )
+
+
+@pytest.fixture
+def database(mocker, tmp_path):
+    path = tmp_path / "source.sqlite3"
+    with sqlite3.connect(path) as db:
+        db.execute("CREATE TABLE schedule (id INTEGER PRIMARY KEY, name TEXT)")
+        db.execute("CREATE TABLE task (id INTEGER PRIMARY KEY)")
+        db.executemany("INSERT INTO schedule (name) VALUES (?)", [("a",), ("b",)])
+    db.close()
+    mocker.patch.dict(connections["default"].settings_dict, NAME=str(path))
+    return path
+
+
+def test_sqlite_backup_is_compressed_with_a_checksum(location, database, clock):
+    metrics = backup.backup_database()
+
+    target = location / metrics["file"]
+    assert target.name.endswith(".sqlite3.gz")
+    with gzip.open(target) as restored:
+        assert restored.read(16) == b"SQLite format 3\x00"
+    assert metrics["bytes"] == target.stat().st_size
+    checksum = (location / f"{target.name}.sha256").read_text()
+    assert checksum == f"{metrics['sha256']}  {target.name}\n"
+    assert metrics["sha256"] == hashlib.sha256(target.read_bytes()).hexdigest()
+    assert not list(location.glob("*.partial"))
+
+
+def test_only_the_newest_backups_are_kept(location, database, clock):
+    runs = [backup.backup_database() for _ in range(3)]
+
+    assert runs[2]["removed"] == [runs[0]["file"]]
+    kept = sorted(p.name for p in location.iterdir())
+    assert kept == sorted(
+        name for run in runs[1:] for name in (run["file"], f"{run['file']}.sha256")
+    )
+
+
+@pytest.mark.parametrize(
+    "compressor",
+    [
+        "gzip",
+        pytest.param(
+            "zstd",
+            marks=pytest.mark.skipif(not shutil.which("zstd"), reason="no zstd"),
+        ),
+    ],
+)
+def test_verify_restores_into_a_scratch_sqlite_file(
+    location, database, clock, settings, compressor
+):
+    settings.BACKUP_COMPRESSOR = compressor
+    first = backup.backup_database()
+    newest = backup.backup_database()
+
+    assert backup.verify_database_backup()["file"] == newest["file"]
+    assert backup.verify_database_backup(location / first["file"])["tables"] == 2
+
+
+def test_verify_rejects_a_corrupted_backup(location, database, clock):
+    target = location / backup.backup_database()["file"]
+    data = target.read_bytes()
+    target.write_bytes(data[:-1] + bytes([data[-1] ^ 0xFF]))
+
+    with pytest.raises(backup.BackupError, match="Checksum mismatch"):
+        backup.verify_database_backup(target)
+
+
+def test_media_objects_are_stored_once_per_content(location, settings, tmp_path, clock):
+    media = tmp_path / "media"
+    (media / "uploads").mkdir(parents=True)
+    (media / "logo.png").write_bytes(b"same")
+    (media / "uploads" / "copy.png").write_bytes(b"same")
+    (media / "notes.txt").write_bytes(b"first")
+    settings.MEDIA_ROOT = str(media)
+
+    first = backup.backup_media()
+    assert (first["files"], first["changed"]) == (3, 3)
+    assert first["bytes"] == len(b"same") + len(b"first")
+    objects = location / "media" / "objects"
+    assert len(list(objects.glob("*/*"))) == 2
+
+    second = backup.backup_media()
+    assert (second["changed"], second["bytes"]) == (0, 0)
+
+    (media / "notes.txt").write_bytes(b"second")
+    third = backup.backup_media()
+    assert (third["changed"], third["bytes"]) == (1, len(b"second"))
+    # The first manifest is pruned but the second still uses "first"
+    assert third["removed"] == [first["manifest"]] and third["orphans"] == 0
+
+    backup.backup_media()
+    stored = {p.name for p in objects.glob("*/*")}
+    assert stored == {hashlib.sha256(data).hexdigest() for data in (b"same", b"second")}
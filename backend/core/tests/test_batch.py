@@ -0,0 +1,79 @@
+import threading
+
+import pytest
+from django.contrib.auth.models import User
+
+from core.api import batch
+
+pytestmark = [pytest.mark.api, pytest.mark.django_db]
+
+AUTH = {"HTTP_AUTHORIZATION": "Bearer test-api-key"}
+
+
+def run_batch(client, *paths):
+    return client.post(
+        "/api/v1/batch/",
+        {"requests": [{"id": str(i), "path": path} for i, path in enumerate(paths)]},
+        content_type="application/json",
+        **AUTH,
+    )
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_batched_csrf_request_sets_the_csrf_cookie(client, settings, workers):
+    settings.API_BATCH_MAX_WORKERS = workers
+
+    response = run_batch(client, "/accounts/auth/csrf", "/options/version/list")
+
+    assert response.status_code == 200
+    token = response.json()[0]["body"]["csrfToken"]
+    assert token
+    assert response.cookies[settings.CSRF_COOKIE_NAME].value
+
+
+def test_batch_results_keep_request_order(client, settings):
+    response = run_batch(client, "/options/version/list", "/missing")
+
+    assert [item["id"] for item in response.json()] == ["0", "1"]
+    assert response.json()[1]["status"] == 404
+    assert settings.CSRF_COOKIE_NAME not in response.cookies
+
+
+def test_writes_run_in_the_request_thread_and_reads_get_a_session_copy(
+    client, settings, monkeypatch
+):
+    settings.API_BATCH_MAX_WORKERS = 4
+    User.objects.create_user("writer", password="secret")
+    calls = []
+    dispatch = batch._dispatch
+
+    def recording(request, item, api_root, session=None):
+        calls.append((item.method, threading.current_thread(), session))
+        return dispatch(request, item, api_root, session)
+
+    monkeypatch.setattr(batch, "_dispatch", recording)
+    login = {"username": "writer", "password": "secret"}
+    response = client.post(
+        "/api/v1/batch/",
+        {
+            "requests": [
+                {"path": "/tasks/schedule/list"},
+                {"path": "/tasks/schedule/list"},
+                {"method": "POST", "path": "/accounts/auth/login", "body": login},
+                {"path": "/tasks/schedule/list"},
+            ]
+        },
+        content_type="application/json",
+        **AUTH,
+    )
+
+    assert [item["status"] for item in response.json()] == [200] * 4
+    assert settings.SESSION_COOKIE_NAME in response.cookies
+    main = threading.current_thread()
+    reads = [call for call in calls if call[0] == "GET"]
+    assert all(
+        thread is not main and session is not None for _, thread, session in reads[:2]
+    )
+    # A lone read between writes needs no thread
+    assert reads[2][1] is main and reads[2][2] is None
+    assert [call[1] for call in calls if call[0] == "POST"] == [main]
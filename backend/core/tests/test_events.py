@@ -0,0 +1,113 @@
+from datetime import timedelta
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.utils import timezone
+
+from core.models import ChangeEvent
+from core.services.events import EventHub, hub
+
+pytestmark = [pytest.mark.api, pytest.mark.django_db]
+
+AUTH = {"HTTP_AUTHORIZATION": "Bearer test-api-key"}
+
+
+def test_batched_streams_do_not_subscribe(client):
+    response = client.post(
+        "/api/v1/batch/",
+        {"requests": [{"path": "/events/stream"} for _ in range(3)]},
+        content_type="application/json",
+        **AUTH,
+    )
+
+    assert [item["status"] for item in response.json()] == [400, 400, 400]
+    assert hub.subscribers == 0
+
+
+def test_wsgi_streams_are_capped(client, settings):
+    settings.EVENTS_MAX_SYNC_STREAMS = 0
+
+    response = client.get("/api/v1/events/stream", **AUTH)
+
+    assert response.status_code == 503
+    assert response["Retry-After"]
+
+
+def test_wsgi_stream_unsubscribes_when_closed(client):
+    response = client.get("/api/v1/events/stream", **AUTH)
+    assert hub.subscribers == 0
+
+    chunks = iter(response.streaming_content)
+    assert next(chunks).startswith(b"retry:")
+    assert hub.subscribers == 1
+
+    response.close()
+    assert hub.subscribers == 0
+
+
+def test_asgi_stream_waits_on_the_event_loop(async_client):
+    @async_to_sync
+    async def first_chunk():
+        response = await async_client.get(
+            "/api/v1/events/stream", headers={"Authorization": "Bearer test-api-key"}
+        )
+        assert response.status_code == 200
+        assert response.is_async
+        chunks = response.streaming_content
+        chunk = await chunks.__anext__()
+        subscribed = hub.subscribers
+        await chunks.aclose()
+        return chunk, subscribed
+
+    chunk, subscribed = first_chunk()
+
+    assert chunk.startswith(b"retry:")
+    assert subscribed == 1
+    assert hub.subscribers == 0
+
+
+def record(event_id):
+    return ChangeEvent.objects.create(id=event_id, kind="schedule.saved", object_id=1)
+
+
+def delivered(events):
+    return [event.id for event in events._buffered(0)]
+
+
+def test_events_committed_out_of_order_are_not_skipped():
+    events = EventHub()
+    events._last_id = events._floor = record(10).id
+
+    # 12 commits while the transaction holding 11 is still open
+    record(12)
+    events._fetch()
+    assert delivered(events) == []
+    assert events.backlog(10) == []
+
+    record(11)
+    events._fetch()
+    assert delivered(events) == [11, 12]
+    assert [event.id for event in events.backlog(10)] == [11, 12]
+    assert events.last_id == 12
+
+
+def test_gaps_left_by_rollbacks_are_skipped_after_the_timeout(settings):
+    events = EventHub()
+    events._last_id = events._floor = record(10).id
+    record(12)
+    events._fetch()
+    assert delivered(events) == []
+
+    settings.EVENTS_GAP_TIMEOUT = 0
+    events._fetch()
+    assert delivered(events) == [12]
+
+
+def test_subscribers_start_before_events_that_may_have_gaps(settings):
+    settled = record(10)
+    ChangeEvent.objects.filter(pk=settled.pk).update(
+        created=timezone.now() - timedelta(seconds=settings.EVENTS_GAP_TIMEOUT + 1)
+    )
+    record(12)
+
+    assert EventHub().settled_id() == 10
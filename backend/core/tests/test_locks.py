@@ -0,0 +1,136 @@
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from core.models import TaskLock, TaskRunRecord
+from core.utils import locks
+
+pytestmark = [pytest.mark.service, pytest.mark.django_db]
+
+
+def outcomes(key):
+    return list(
+        TaskRunRecord.objects.filter(key=key)
+        .order_by("id")
+        .values_list("outcome", flat=True)
+    )
+
+
+def test_skip_drops_the_second_run():
+    first = locks.acquire("job", locks.SKIP)
+
+    assert first is not None
+    assert locks.acquire("job", locks.SKIP) is None
+    assert outcomes("job") == [TaskRunRecord.SKIPPED]
+
+    assert first.release() is None
+    second = locks.acquire("job", locks.SKIP)
+    assert second is not None
+    second.release()
+
+
+def test_queue_keeps_exactly_one_follower():
+    first = locks.acquire("job", locks.QUEUE)
+
+    assert locks.acquire("job", locks.QUEUE, pending={"args": [1]}) is None
+    assert locks.acquire("job", locks.QUEUE, pending={"args": [2]}) is None
+    assert outcomes("job") == [TaskRunRecord.QUEUED, TaskRunRecord.SKIPPED]
+
+    queued = first.release()
+    assert queued["args"] == [1]
+    assert "queued_at" in queued
+    assert TaskLock.objects.get(key="job").pending is None
+
+
+def test_replace_takes_over_and_the_old_run_notices():
+    first = locks.acquire("job", locks.REPLACE)
+    second = locks.acquire("job", locks.REPLACE)
+
+    assert second is not None
+    assert outcomes("job") == [TaskRunRecord.REPLACED]
+    assert first.renew() is False
+    assert first.lost.is_set()
+
+    # The replaced run must not free the lock of its successor
+    assert first.release() is None
+    assert TaskLock.objects.get(key="job").owner == second.owner
+    assert second.renew() is True
+    second.release()
+
+
+def test_lapsed_lease_is_recovered():
+    TaskLock.objects.create(
+        key="job", owner="dead", expires=timezone.now() - timedelta(seconds=1)
+    )
+
+    lease = locks.acquire("job", locks.SKIP)
+
+    assert lease is not None
+    assert outcomes("job") == [TaskRunRecord.RECOVERED]
+    lease.release()
+
+
+def test_lost_race_is_retried_not_double_granted(mocker):
+    real_swap = locks._swap
+    calls = []
+
+    def swap(lock, *conditions, **changes):
+        # Another run takes the free lock between our read and our update
+        if not calls:
+            calls.append(lock)
+            TaskLock.objects.filter(pk=lock.pk).update(
+                owner="other", expires=timezone.now() + timedelta(seconds=60)
+            )
+        return real_swap(lock, *conditions, **changes)
+
+    mocker.patch.object(locks, "_swap", side_effect=swap)
+
+    assert locks.acquire("job", locks.SKIP) is None
+    assert outcomes("job") == [TaskRunRecord.SKIPPED]
+    assert TaskLock.objects.get(key="job").owner == "other"
+
+
+def test_guarded_task_sees_its_lease_and_stops_when_replaced():
+    seen = []
+
+    @locks.guarded(locks.REPLACE)
+    def task():
+        lease = locks.current_lease()
+        seen.append(lease)
+        locks.acquire(lease.key, locks.REPLACE).release()
+        lease.renew()
+        locks.check_lease()
+        seen.append("not stopped")
+
+    assert task() is None
+    assert seen[0] is not None
+    assert "not stopped" not in seen
+    assert locks.current_lease() is None
+    locks.check_lease()
+
+
+def test_allow_runs_without_a_lock():
+    @locks.guarded(locks.ALLOW)
+    def task(value):
+        return value, locks.current_lease()
+
+    assert task(3) == (3, None)
+    assert not TaskLock.objects.exists()
+
+
+def test_same_connection_cannot_take_the_lock_twice_on_postgres(mocker):
+    # Session advisory locks are reentrant per connection; the lease row is not
+    mocker.patch.object(connection, "vendor", "postgresql")
+
+    with CaptureQueriesContext(connection) as queries:
+        first = locks.acquire("job", locks.SKIP)
+        second = locks.acquire("job", locks.SKIP)
+
+    assert first is not None and second is None
+    assert outcomes("job") == [TaskRunRecord.SKIPPED]
+    assert not any("advisory" in query["sql"] for query in queries)
+    first.release()
+    assert locks.acquire("job", locks.SKIP) is not None
@@ -0,0 +1,74 @@
+from datetime import timedelta
+from uuid import uuid4
+
+import pytest
+from django.utils import timezone
+from django_q.models import Task
+
+from core.utils import renderers
+
+pytestmark = [pytest.mark.api, pytest.mark.django_db]
+
+AUTH = {"HTTP_AUTHORIZATION": "Bearer test-api-key"}
+
+
+def page_through(client, url, limit):
+    names, cursor = [], None
+    while True:
+        query = f"{url}?limit={limit}" + (f"&cursor={cursor}" if cursor else "")
+        response = client.get(query, **AUTH)
+        assert response.status_code == 200
+        page = response.json()
+        names += [item["name"] for item in page["items"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return names
+
+
+@pytest.mark.parametrize("orjson", [True, False])
+def test_keyset_pages_keep_microsecond_precision(client, monkeypatch, orjson):
+    if not orjson:
+        monkeypatch.setattr(renderers, "orjson", None)
+    now = timezone.now().replace(microsecond=0)
+    Task.objects.bulk_create(
+        Task(
+            id=uuid4().hex,
+            name=f"task-{i}",
+            func="core.tasks.summarize_backups",
+            started=now,
+            stopped=now - timedelta(microseconds=i),
+            success=True,
+        )
+        for i in range(10)
+    )
+
+    names = page_through(client, "/api/v1/tasks/success/list", limit=3)
+
+    assert names == [f"task-{i}" for i in range(10)]
+
+
+def test_keyset_pages_break_ties_on_the_primary_key(client):
+    now = timezone.now()
+    ids = sorted(uuid4().hex for _ in range(5))
+    Task.objects.bulk_create(
+        Task(
+            id=task_id,
+            name=task_id,
+            func="core.tasks.summarize_backups",
+            started=now,
+            stopped=now,
+            success=False,
+        )
+        for task_id in ids
+    )
+
+    names = page_through(client, "/api/v1/tasks/failure/list", limit=2)
+
+    assert names == list(reversed(ids))
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", "WzFd"])
+def test_invalid_cursor_is_rejected(client, cursor):
+    response = client.get(f"/api/v1/tasks/success/list?cursor={cursor}", **AUTH)
+
+    assert response.status_code == 400
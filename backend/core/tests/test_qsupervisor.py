@@ -0,0 +1,119 @@
+import itertools
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+from django_q.models import OrmQ
+
+from core.management.commands import qsupervisor
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture
+def popen(mocker):
+    pids = itertools.count(100)
+
+    def start(*args, **kwargs):
+        process = mocker.Mock(pid=next(pids), returncode=None)
+        process.poll.return_value = None
+        return process
+
+    return mocker.patch.object(qsupervisor.subprocess, "Popen", side_effect=start)
+
+
+@pytest.fixture
+def supervisor(settings, popen):
+    settings.QSUPERVISOR = {
+        "min_workers": 2,
+        "max_workers": 6,
+        "workers_per_cluster": 2,
+        "interval": 0,
+        "scale_up_depth": 5,
+        "scale_up_wait": 30,
+        "scale_down_idle_ticks": 3,
+    }
+    command = qsupervisor.Command()
+    command.conf = settings.QSUPERVISOR
+    command.clusters = []
+    command.draining = []
+    command.scheduler = None
+    command.idle_ticks = 0
+    command._start_cluster("below minimum")
+    return command
+
+
+def scheduler_flags(popen):
+    return [call.kwargs["env"]["Q_CLUSTER_SCHEDULER"] for call in popen.call_args_list]
+
+
+@pytest.mark.parametrize("depth, wait", [(11, 0), (1, 31)])
+def test_scales_up_on_depth_or_wait(supervisor, depth, wait):
+    supervisor._scale(depth, wait)
+
+    assert supervisor._workers() == 4
+
+
+def test_stays_below_max_workers(supervisor):
+    for _ in range(5):
+        supervisor._scale(1000, 600)
+
+    assert supervisor._workers() == 6
+
+
+def test_scales_down_after_the_idle_cooldown(supervisor):
+    supervisor._scale(1000, 0)
+    newest = supervisor.clusters[-1]
+
+    supervisor._scale(0, 0)
+    supervisor._scale(0, 0)
+    supervisor._scale(1, 0)  # work arrived: the cooldown starts over
+    supervisor._scale(0, 0)
+    supervisor._scale(0, 0)
+    assert supervisor._workers() == 4
+
+    supervisor._scale(0, 0)
+    assert supervisor._workers() == 2
+    assert supervisor.draining == [newest]
+    newest.send_signal.assert_called_once()
+
+
+def test_never_scales_below_min_workers(supervisor):
+    for _ in range(10):
+        supervisor._scale(0, 0)
+
+    assert supervisor._workers() == 2
+    assert supervisor.draining == []
+
+
+def test_only_one_cluster_runs_the_scheduler(supervisor, popen):
+    supervisor._scale(1000, 0)
+    supervisor._scale(1000, 0)
+    assert scheduler_flags(popen) == ["1", "0", "0"]
+
+    # The scheduler's cluster dies; the next one started takes over
+    first = supervisor.clusters[0]
+    first.poll.return_value = 1
+    supervisor._reap()
+    supervisor._start_cluster("replacing")
+    assert scheduler_flags(popen) == ["1", "0", "0", "1"]
+    assert supervisor.scheduler is supervisor.clusters[-1]
+
+
+@pytest.mark.django_db
+def test_queue_stats_count_claimed_tasks_and_age_the_oldest_waiting(settings):
+    now = timezone.now()
+    name = settings.Q_CLUSTER["name"]
+    for key, lock in [
+        (name, now - timedelta(seconds=40)),
+        (name, now - timedelta(seconds=10)),
+        # Claimed by a cluster: its lock runs until the task times out
+        (name, now + timedelta(seconds=60)),
+        ("another-cluster", now - timedelta(seconds=90)),
+    ]:
+        OrmQ.objects.create(key=key, payload="task", lock=lock)
+
+    depth, wait = qsupervisor.Command()._queue_stats()
+
+    assert depth == 3
+    assert 40 <= wait < 45
@@ -0,0 +1,55 @@
+from datetime import timedelta
+from uuid import uuid4
+
+import pytest
+from django.utils import timezone
+from django_q.models import Task
+
+from core.api.tasks import TaskOut
+
+pytestmark = [pytest.mark.api, pytest.mark.django_db]
+
+AUTH = {"HTTP_AUTHORIZATION": "Bearer test-api-key"}
+
+
+def make_tasks(count, success=True):
+    now = timezone.now()
+    return Task.objects.bulk_create(
+        Task(
+            id=uuid4().hex,
+            name=f"task-{i}",
+            func="core.tasks.summarize_backups",
+            started=now - timedelta(seconds=i + 1),
+            stopped=now - timedelta(seconds=i),
+            success=success,
+        )
+        for i in range(count)
+    )
+
+
+@pytest.mark.parametrize("skip", [True, False])
+def test_paginated_list_is_rendered_without_revalidation(
+    client, settings, mocker, skip
+):
+    settings.API_SKIP_RESPONSE_VALIDATION = skip
+    validate = mocker.spy(TaskOut, "model_validate")
+    make_tasks(3)
+
+    response = client.get("/api/v1/tasks/success/list?limit=2", **AUTH)
+
+    assert response.status_code == 200
+    page = response.json()
+    assert [item["name"] for item in page["items"]] == ["task-0", "task-1"]
+    assert set(page["items"][0]) == {
+        "id",
+        "name",
+        "func",
+        "group",
+        "cluster",
+        "started",
+        "stopped",
+        "success",
+        "attempt_count",
+    }
+    assert page["next_cursor"]
+    assert validate.call_count == (0 if skip else 2)
@@ -0,0 +1,84 @@
+import time
+
+import pytest
+from django.contrib.auth.models import User
+from django_q.models import Schedule
+
+from core import routers
+
+# The replica is a separate database here, so rows written to the primary
+# show which database a read went to
+pytestmark = [
+    pytest.mark.api,
+    pytest.mark.django_db(transaction=True, databases=["default", "replica"]),
+]
+
+AUTH = {"HTTP_AUTHORIZATION": "Bearer test-api-key"}
+SCHEDULES = "/api/v1/tasks/schedule/list"
+
+
+@pytest.fixture(autouse=True)
+def replica(settings, monkeypatch):
+    settings.DATABASE_REPLICAS = ["replica"]
+    monkeypatch.setattr(routers, "_health", {})
+    Schedule.objects.create(func="math.floor", args="1")
+    User.objects.create_user("reader", password="secret")
+    return "replica"
+
+
+def schedule_count(client):
+    response = client.get(SCHEDULES, **AUTH)
+    assert response.status_code == 200
+    return len(response.json()["items"])
+
+
+def test_get_reads_from_the_replica(client, settings):
+    assert schedule_count(client) == 0
+    assert settings.REPLICA_STICKY_COOKIE not in client.cookies
+
+
+def test_write_sets_the_sticky_cookie(client, settings):
+    response = client.post(
+        "/api/v1/accounts/auth/login",
+        {"username": "reader", "password": "secret"},
+        content_type="application/json",
+    )
+
+    assert response.status_code == 200
+    until = int(response.cookies[settings.REPLICA_STICKY_COOKIE].value)
+    assert until > time.time()
+
+
+def test_sticky_request_reads_from_the_primary(client, settings):
+    client.cookies[settings.REPLICA_STICKY_COOKIE] = str(int(time.time()) + 60)
+    assert schedule_count(client) == 1
+
+    client.cookies[settings.REPLICA_STICKY_COOKIE] = str(int(time.time()) - 1)
+    assert schedule_count(client) == 0
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_batched_write_sets_the_sticky_cookie(client, settings, workers):
+    settings.API_BATCH_MAX_WORKERS = workers
+    # Keep the session out of the database: the only write is last_login,
+    # made by the sub-request itself
+    settings.SESSION_ENGINE = "django.contrib.sessions.backends.signed_cookies"
+
+    response = client.post(
+        "/api/v1/batch/",
+        {
+            "requests": [
+                {"path": "/tasks/schedule/list"},
+                {
+                    "method": "POST",
+                    "path": "/accounts/auth/login",
+                    "body": {"username": "reader", "password": "secret"},
+                },
+            ]
+        },
+        content_type="application/json",
+        **AUTH,
+    )
+
+    assert [item["status"] for item in response.json()] == [200, 200]
+    assert settings.REPLICA_STICKY_COOKIE in response.cookies
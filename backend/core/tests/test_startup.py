@@ -0,0 +1,103 @@
+import json
+import os
+import subprocess
+import sys
+from io import StringIO
+
+import pytest
+from django.conf import settings
+from django.core.management import call_command
+
+from core.management.commands.startup_profile import Command
+
+IMPORTTIME = """\
+import time: self [us] | cumulative | imported package
+import time:      1000 |       1000 |     c
+import time:      2000 |       3000 |   b
+import time:      4000 |       4000 |   d
+import time:      5000 |      12000 | a
+import time:       100 |        100 | e
+"""
+
+# Boots a web worker's Django and loads the admin and every URL
+WEB_PROBE = """
+import json
+import django
+django.setup()
+from django.conf import settings
+from django.contrib import admin
+from django.core.management import call_command
+from django.urls import get_resolver, reverse
+get_resolver().url_patterns
+reverse("admin:index")
+call_command("check", fail_level="ERROR")
+print(json.dumps({"apps": settings.INSTALLED_APPS, "admin": len(admin.site._registry)}))
+"""
+
+
+def names(nodes):
+    return [(node["name"], names(node["children"])) for node in nodes]
+
+
+@pytest.mark.unit
+def test_importtime_output_is_parsed_into_a_tree():
+    tree = Command()._parse_importtime(IMPORTTIME)
+
+    assert names(tree) == [("a", [("b", [("c", [])]), ("d", [])]), ("e", [])]
+    assert (tree[0]["self"], tree[0]["cumulative"]) == (5000, 12000)
+
+
+@pytest.mark.unit
+def test_import_tree_is_cut_by_time_and_depth():
+    command = Command(stdout=StringIO())
+    tree = command._parse_importtime(IMPORTTIME)
+
+    for node in tree:
+        command._write_node(node, 0, {"min_ms": 2.0, "depth": 2})
+
+    assert command.stdout.getvalue().splitlines() == [
+        "  a  12.0 / 5.0",
+        "    d  4.0 / 4.0",
+        "    b  3.0 / 2.0",
+    ]
+
+
+def run_web_probe():
+    env = {
+        **os.environ,
+        "DJANGO_SETTINGS_MODULE": settings.SETTINGS_MODULE,
+        "DJANGO_PROCESS": "web",
+    }
+    result = subprocess.run(
+        [sys.executable, "-c", WEB_PROBE],
+        cwd=settings.BASE_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+@pytest.mark.service
+def test_web_workers_skip_command_only_apps_and_still_load_admin_and_urls():
+    web = run_web_probe()
+
+    for app in ("import_export", "dbbackup", "django_filters"):
+        assert app in settings.INSTALLED_APPS
+        assert app not in web["apps"]
+    assert "django.contrib.admin" in web["apps"]
+    assert web["admin"] > 0
+
+
+@pytest.mark.service
+def test_startup_profile_reports_the_web_app_set():
+    out = StringIO()
+
+    call_command("startup_profile", "--web", "--min-ms", "50", stdout=out)
+
+    report = out.getvalue()
+    assert report.startswith("Profile: web worker")
+    apps = report.split("Apps (ms)")[1].split("Imports over")[0]
+    assert "django.contrib.admin" in apps
+    assert "import_export" not in apps
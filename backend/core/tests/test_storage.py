@@ -0,0 +1,28 @@
+import pytest
+
+from core.storage import CompressedManifestStaticFilesStorage
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return CompressedManifestStaticFilesStorage(location=tmp_path)
+
+
+def test_uncollected_jazzmin_images_keep_their_plain_name(storage, settings):
+    assert storage.stored_name(settings.JAZZMIN_SETTINGS["site_logo"]) == "logov2.png"
+    assert storage.stored_name(settings.JAZZMIN_SETTINGS["site_icon"]) == "favicon.ico"
+
+
+def test_other_missing_files_still_raise(storage):
+    with pytest.raises(ValueError):
+        storage.stored_name("assets/missing.js")
+
+
+@pytest.mark.django_db
+def test_admin_pages_render_without_collected_static(client):
+    response = client.get("/admin/login/")
+
+    assert response.status_code == 200
+    assert b"/static/" in response.content
@@ -0,0 +1,112 @@
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django_q.models import Failure, OrmQ, Success
+
+from core import tasks
+
+pytestmark = [pytest.mark.service, pytest.mark.django_db]
+
+
+def make_results(model, count, age, prefix="task"):
+    stopped = timezone.now() - age
+    model.objects.bulk_create(
+        model(
+            id=f"{prefix}-{i:03}",
+            name=f"{prefix}-{i}",
+            func="math.floor",
+            args=(i,),
+            kwargs={},
+            started=stopped,
+            stopped=stopped,
+            success=model is Success,
+        )
+        for i in range(count)
+    )
+    return sorted(
+        model.objects.filter(id__startswith=prefix).values_list("pk", flat=True)
+    )
+
+
+def run_queued(queued):
+    # Run the admin's background tasks inline, from their stored payloads
+    results = []
+    for row in queued:
+        path = row.task["func"]
+        assert path in ("core.tasks.requeue_tasks", "core.tasks.purge_tasks")
+        results.append(getattr(tasks, path.rsplit(".", 1)[1])(*row.task["args"]))
+        row.delete()
+    return results
+
+
+@pytest.fixture
+def admin_client(client):
+    client.force_login(User.objects.create_superuser("admin", password="secret"))
+    return client
+
+
+def test_requeue_reads_each_batch_in_one_query(settings):
+    settings.ADMIN_TASK_BATCH_SIZE = 8
+    pks = make_results(Failure, 20, timedelta(hours=1))
+
+    with CaptureQueriesContext(connection) as queries:
+        assert tasks.requeue_tasks("django_q.Failure", pks) == 20
+
+    assert OrmQ.objects.count() == 20
+    assert not Failure.objects.exists()
+    # Per batch one select and one delete, plus one insert per task
+    assert len(queries) <= 20 + 3 * 2
+
+
+def test_purge_deletes_only_expired_rows_in_batches(settings):
+    settings.ADMIN_TASK_BATCH_SIZE = 3
+    old = make_results(Success, 7, timedelta(days=40), prefix="old")
+    new = make_results(Success, 2, timedelta(hours=1), prefix="new")
+    before = timezone.now() - timedelta(days=30)
+
+    with CaptureQueriesContext(connection) as queries:
+        assert tasks.purge_tasks("django_q.Success", old + new, before) == 7
+
+    assert sorted(Success.objects.values_list("pk", flat=True)) == new
+    deletes = [q for q in queries if q["sql"].startswith("DELETE")]
+    assert len(deletes) == 3
+
+
+def test_admin_purge_queues_plain_primary_keys(admin_client, settings):
+    settings.ADMIN_TASK_BATCH_SIZE = 4
+    old = make_results(Success, 6, timedelta(days=40), prefix="old")
+    new = make_results(Success, 1, timedelta(hours=1), prefix="new")
+
+    response = admin_client.post(
+        "/admin/django_q/success/",
+        {
+            "action": "purge_selected",
+            "_selected_action": old + new,
+            "days": 30,
+            "apply": 1,
+        },
+    )
+
+    assert response.status_code == 302
+    queued = list(OrmQ.objects.order_by("id"))
+    assert [row.task["args"][1] for row in queued] == [old[:4], old[4:]]
+    assert run_queued(queued) == [4, 2]
+    assert list(Success.objects.values_list("pk", flat=True)) == new
+
+
+def test_admin_requeue_queues_plain_primary_keys(admin_client):
+    pks = make_results(Failure, 3, timedelta(hours=1))
+
+    admin_client.post(
+        "/admin/django_q/failure/",
+        {"action": "requeue_selected", "_selected_action": pks},
+    )
+
+    queued = list(OrmQ.objects.all())
+    assert [row.task["args"] for row in queued] == [("django_q.Failure", pks)]
+    assert run_queued(queued) == [3]
+    assert OrmQ.objects.count() == 3
@@ -0,0 +1,117 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+from django_q.conf import Conf
+
+from core import tasks
+from core.models import TaskRunRecord, Workflow, WorkflowStep
+from core.services import workflows
+from core.services.workflows import chain, chord, group, step
+
+pytestmark = [pytest.mark.service, pytest.mark.django_db(transaction=True)]
+
+
+@pytest.fixture(autouse=True)
+def sync_tasks(monkeypatch):
+    # Steps run inline and their hook fires before async_task returns
+    monkeypatch.setattr(Conf, "SYNC", True)
+
+
+def statuses(workflow):
+    return list(
+        workflow.steps.order_by("stage", "position").values_list("status", flat=True)
+    )
+
+
+def test_chord_passes_group_results_to_the_callback():
+    workflow = workflows.start_workflow(
+        "sums",
+        chord(group(step("operator.add", 1, 2), step("operator.add", 3, 4)), step(sum)),
+    )
+
+    workflow.refresh_from_db()
+    assert workflow.status == Workflow.SUCCESS
+    assert statuses(workflow) == [WorkflowStep.SUCCESS] * 3
+    callback = workflow.steps.get(stage=1)
+    assert workflows._stage_results(workflow, 1) == [10]
+    assert callback.task_id and callback.started and callback.stopped
+
+
+def test_stop_skips_the_remaining_stages():
+    workflow = workflows.start_workflow(
+        "stops",
+        chain(
+            group(step("math.sqrt", -1), step("operator.add", 1, 2)),
+            step("operator.add", 3, 4),
+        ),
+    )
+
+    workflow.refresh_from_db()
+    assert workflow.status == Workflow.FAILED
+    assert statuses(workflow) == [
+        WorkflowStep.FAILED,
+        WorkflowStep.SUCCESS,
+        WorkflowStep.SKIPPED,
+    ]
+
+
+def test_continue_runs_later_stages_and_passes_none_for_failures():
+    workflow = workflows.start_workflow(
+        "continues",
+        chord(group(step("math.sqrt", -1), step("operator.add", 1, 2)), step(list)),
+        on_failure=Workflow.CONTINUE,
+    )
+
+    workflow.refresh_from_db()
+    assert workflow.status == Workflow.PARTIAL
+    assert statuses(workflow)[-1] == WorkflowStep.SUCCESS
+    assert workflows._stage_results(workflow, 1) == [[None, 3]]
+
+
+@pytest.fixture
+def registered(monkeypatch):
+    monkeypatch.setitem(
+        workflows._registry,
+        "adds",
+        {"build": lambda: chain(step("operator.add", 1, 2)), "on_failure": "stop"},
+    )
+    monkeypatch.setattr(Conf, "SYNC", False)
+    return "adds"
+
+
+def stuck_run(name, age):
+    workflow = Workflow.objects.create(name=name, status=Workflow.RUNNING)
+    WorkflowStep.objects.create(
+        workflow=workflow,
+        stage=0,
+        position=0,
+        func="operator.add",
+        status=WorkflowStep.RUNNING,
+    )
+    WorkflowStep.objects.create(
+        workflow=workflow, stage=1, position=0, func="operator.add"
+    )
+    Workflow.objects.filter(pk=workflow.pk).update(created=timezone.now() - age)
+    return workflow
+
+
+def test_run_workflow_skips_while_a_recent_run_is_in_progress(registered):
+    running = stuck_run(registered, timedelta(minutes=5))
+
+    assert tasks.run_workflow(registered) is None
+    assert TaskRunRecord.objects.get(key=registered).outcome == TaskRunRecord.SKIPPED
+    running.refresh_from_db()
+    assert running.status == Workflow.RUNNING
+
+
+def test_run_workflow_fails_a_stuck_run_and_starts_over(registered):
+    stuck = stuck_run(registered, timedelta(hours=1))
+
+    started = tasks.run_workflow(registered)
+
+    assert started is not None and started != stuck.pk
+    stuck.refresh_from_db()
+    assert stuck.status == Workflow.FAILED and stuck.finished
+    assert statuses(stuck) == [WorkflowStep.FAILED, WorkflowStep.SKIPPED]
+    assert Workflow.objects.get(pk=started).status == Workflow.RUNNING
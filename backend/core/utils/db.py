@@ -0,0 +1,54 @@
+import json
+import logging
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import QuerySet
+
+db_logger = logging.getLogger("db")
+
+
+def estimated_count(queryset: QuerySet) -> int:
+    """
+    The function `estimated_count` returns the number of rows in `queryset`,
+    using the Postgres planner statistics instead of a full `COUNT(*)` when
+    the table is large. Unfiltered querysets use `pg_class.reltuples`,
+    filtered ones the row estimate of `EXPLAIN`. Estimates below
+    `ESTIMATED_COUNT_THRESHOLD` and other database vendors fall back to an
+    exact count.
+
+    Args:
+        queryset (QuerySet): The queryset to count.
+
+    Returns:
+        int: The estimated (or exact) number of rows.
+    """
+    threshold = getattr(settings, "ESTIMATED_COUNT_THRESHOLD", 10000)
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return queryset.count()
+
+    queryset = queryset.order_by()
+    try:
+        with connection.cursor() as cursor:
+            if not queryset.query.where:
+                cursor.execute(
+                    "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                    [queryset.model._meta.db_table],
+                )
+                row = cursor.fetchone()
+                estimate = row[0] if row else -1
+            else:
+                sql, params = queryset.query.sql_with_params()
+                cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+                plan = cursor.fetchone()[0]
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                estimate = int(plan[0]["Plan"]["Plan Rows"])
+    except Exception as e:
+        db_logger.warning(f"Count estimate failed, counting exactly: {str(e)}")
+        return queryset.count()
+
+    if estimate < threshold:
+        return queryset.count()
+    return estimate
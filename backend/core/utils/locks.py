@@ -0,0 +1,286 @@
+import logging
+import threading
+import uuid
+from contextvars import ContextVar
+from datetime import timedelta
+from functools import wraps
+from typing import Any, Callable, Dict, Optional
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django_q.tasks import async_task
+
+from core.models import TaskLock, TaskRunRecord
+
+api_logger = logging.getLogger("api")
+db_logger = logging.getLogger("db")
+error_logger = logging.getLogger("error")
+task_logger = logging.getLogger("task")
+
+ALLOW = "allow"
+SKIP = "skip"
+QUEUE = "queue"
+REPLACE = "replace"
+POLICIES = (ALLOW, SKIP, QUEUE, REPLACE)
+
+# Conditional updates retried when another run changed the lock row first
+SWAP_ATTEMPTS = 5
+
+
+class LeaseLost(Exception):
+    """
+    Raised by `check_lease` in a guarded task whose lock was taken over.
+    """
+
+
+class Lease:
+    """
+    A held TaskLock. While held, a background thread renews the lease every
+    third of its length. If the lock is taken over (replace policy, or after
+    the lease lapsed) the next renewal sets `lost`. Guarded tasks reach
+    their lease through `current_lease` and stop early with `check_lease`.
+    """
+
+    def __init__(self, key: str, owner: str, seconds: int):
+        self.key = key
+        self.owner = owner
+        self.seconds = seconds
+        self.lost = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._renew, name=f"lease-{key}", daemon=True
+        )
+        self._thread.start()
+
+    def release(self) -> Optional[Dict[str, Any]]:
+        """
+        The function `release` frees the lock if this run still owns it.
+
+        Returns:
+            dict: the arguments of a run queued behind this one, if any
+        """
+        self._stop.set()
+        self._thread.join()
+        free = {"owner": "", "expires": None, "pending": None}
+        owned = TaskLock.objects.filter(key=self.key, owner=self.owner)
+        pending = None
+        if not owned.filter(pending__isnull=True).update(**free):
+            # Only the owner clears `pending`, so it cannot change under us
+            pending = owned.values_list("pending", flat=True).first()
+            if not owned.update(**free):
+                pending = None
+        return pending
+
+    def renew(self) -> bool:
+        """
+        The function `renew` extends the lease, or sets `lost` if another run
+        has taken the lock over.
+
+        Returns:
+            bool: True if this run still holds the lock
+        """
+        renewed = TaskLock.objects.filter(key=self.key, owner=self.owner).update(
+            expires=timezone.now() + timedelta(seconds=self.seconds)
+        )
+        if not renewed:
+            task_logger.warning(f"Lost lock on {self.key}")
+            self.lost.set()
+        return bool(renewed)
+
+    def _renew(self) -> None:
+        try:
+            while not self._stop.wait(self.seconds / 3):
+                if not self.renew():
+                    return
+        except Exception as e:
+            error_logger.error(f"Lease renewal for {self.key} failed: {str(e)}")
+        finally:
+            connection.close()
+
+
+_current: ContextVar[Optional[Lease]] = ContextVar("task_lease", default=None)
+
+
+def current_lease() -> Optional[Lease]:
+    """
+    The function `current_lease` returns the lease of the guarded task
+    running in this thread.
+
+    Returns:
+        Lease: the held lease, or None outside a guarded task
+    """
+    return _current.get()
+
+
+def check_lease() -> None:
+    """
+    The function `check_lease` stops a guarded task whose lock was taken
+    over, e.g. by a run with the replace policy. Long-running tasks call it
+    between units of work; outside a guarded task it does nothing.
+
+    Raises:
+        LeaseLost: If the lock now belongs to another run.
+    """
+    lease = _current.get()
+    if lease is not None and lease.lost.is_set():
+        raise LeaseLost(f"Lock on {lease.key} was taken over")
+
+
+def acquire(
+    key: str,
+    policy: str = SKIP,
+    seconds: Optional[int] = None,
+    pending: Optional[Dict[str, Any]] = None,
+) -> Optional[Lease]:
+    """
+    The function `acquire` tries to take the lock for `key`: a renewable
+    lease on the TaskLock row, changed only by conditional updates, so it
+    works the same on every database and two runs on one worker connection
+    still exclude each other. A lapsed lease (its worker died or timed out)
+    is taken over and recorded as recovered.
+
+    When the lock is busy, `policy` decides what happens:
+    - skip: this run is dropped and recorded.
+    - queue: `pending` is stored so exactly one run follows the current
+      one; any further runs are dropped.
+    - replace: the lock is taken over; the previous holder sees `lost` at
+      its next renewal and stops at its next `check_lease`.
+
+    Args:
+        key (str): The name to lock, usually the schedule name.
+        policy (str): One of skip, queue or replace.
+        seconds (int, optional): The lease length, default `TASK_LOCK_LEASE`.
+        pending (dict, optional): Arguments to store for the queue policy.
+
+    Returns:
+        Lease: the held lock, or None if this run must not start
+    """
+    seconds = seconds or settings.TASK_LOCK_LEASE
+    owner = uuid.uuid4().hex
+
+    # Every change is an UPDATE that only applies while the row still holds
+    # what was read (compare-and-swap); a lost race re-reads. Session locks
+    # such as Postgres advisory locks are reentrant on one connection and
+    # would let a worker take the same lock twice.
+    TaskLock.objects.get_or_create(key=key)
+    for _ in range(SWAP_ATTEMPTS):
+        lock = TaskLock.objects.get(key=key)
+        now = timezone.now()
+        live = bool(lock.owner) and lock.expires is not None and lock.expires > now
+        take = {
+            "owner": owner,
+            "acquired": now,
+            "expires": now + timedelta(seconds=seconds),
+        }
+
+        if not live:
+            if not _swap(lock, **take):
+                continue
+            if lock.owner:
+                # The previous run died without releasing (worker killed or timed out)
+                _record(key, TaskRunRecord.RECOVERED, f"stale owner {lock.owner}")
+            return Lease(key, owner, seconds)
+        if policy == QUEUE and lock.pending is None:
+            queued = {**(pending or {}), "queued_at": now.isoformat()}
+            if not _swap(lock, Q(pending__isnull=True), pending=queued):
+                continue
+            _record(key, TaskRunRecord.QUEUED, f"behind {lock.owner}")
+            return None
+        if policy == REPLACE:
+            if not _swap(lock, **take):
+                continue
+            _record(key, TaskRunRecord.REPLACED, f"replaced {lock.owner}")
+            return Lease(key, owner, seconds)
+        _record(key, TaskRunRecord.SKIPPED, f"busy with {lock.owner}")
+        return None
+
+    _record(key, TaskRunRecord.SKIPPED, "lock changed on every attempt")
+    return None
+
+
+def _swap(lock: TaskLock, *conditions: Q, **changes: Any) -> bool:
+    # Apply `changes` only if owner and lease are still as in `lock`
+    return bool(
+        TaskLock.objects.filter(
+            *conditions, pk=lock.pk, owner=lock.owner, expires=lock.expires
+        ).update(**changes)
+    )
+
+
+def guarded(policy: str = SKIP, seconds: Optional[int] = None) -> Callable:
+    """
+    The function `guarded` decorates a task so overlapping runs follow a
+    concurrency policy (allow, skip, queue or replace).
+
+    Schedules created by `scheduletasks` with a `concurrency` entry pass the
+    reserved `_schedule` and `_concurrency` keyword arguments, which make the
+    lock per schedule and override `policy`. They are removed before the task
+    is called.
+
+    While the task runs its lease is available through `current_lease`; a
+    task that raises `LeaseLost` (see `check_lease`) ends quietly, as the run
+    that replaced it is now in charge.
+
+    Args:
+        policy (str): The default policy.
+        seconds (int, optional): The lease length, default `TASK_LOCK_LEASE`.
+
+    Returns:
+        Callable: the decorator
+    """
+    if policy not in POLICIES:
+        raise ValueError(f"Unknown concurrency policy: {policy}")
+
+    def decorator(func: Callable) -> Callable:
+        path = f"{func.__module__}.{func.__name__}"
+
+        @wraps(func)
+        def wrapper(
+            *args, _schedule=None, _concurrency=None, _queued_at=None, **kwargs
+        ):
+            mode = _concurrency or policy
+            if mode == ALLOW:
+                return func(*args, **kwargs)
+
+            key = _schedule or path
+            lease = acquire(
+                key, mode, seconds, pending={"args": list(args), "kwargs": kwargs}
+            )
+            if lease is None:
+                return None
+            if _queued_at:
+                waited = (timezone.now() - parse_datetime(_queued_at)).total_seconds()
+                _record(key, TaskRunRecord.DELAYED, wait_seconds=waited)
+
+            token = _current.set(lease)
+            try:
+                return func(*args, **kwargs)
+            except LeaseLost as e:
+                task_logger.warning(f"{key}: stopped, {str(e)}")
+                return None
+            finally:
+                _current.reset(token)
+                queued = lease.release()
+                if queued:
+                    async_task(
+                        path,
+                        *queued["args"],
+                        _schedule=_schedule,
+                        _concurrency=mode,
+                        _queued_at=queued["queued_at"],
+                        **queued["kwargs"],
+                    )
+
+        return wrapper
+
+    return decorator
+
+
+def _record(key: str, outcome: str, detail: str = "", wait_seconds=None) -> None:
+    TaskRunRecord.objects.create(
+        key=key, outcome=outcome, detail=detail, wait_seconds=wait_seconds
+    )
+    task_logger.info(f"{key}: {outcome} {detail}".strip())
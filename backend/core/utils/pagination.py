@@ -0,0 +1,196 @@
+import base64
+import binascii
+import json
+from datetime import date, time
+from decimal import Decimal
+from functools import cached_property
+from typing import Any, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db.models import Q, QuerySet
+from django.http import HttpRequest
+from ninja import Field, Schema
+from ninja.conf import settings as ninja_settings
+from ninja.errors import HttpError
+from ninja.pagination import PaginationBase
+
+from core.utils.db import estimated_count
+
+
+class KeysetPagination(PaginationBase):
+    """
+    Cursor based pagination for ninja list endpoints.
+
+    Pages are addressed by an opaque cursor encoding the ordering values of
+    the last row served, so every page is a single indexed range scan no
+    matter how deep the client has paged. The primary key is always appended
+    to the ordering as a tie breaker. Ordering fields must be non-null and
+    should be covered by an index.
+
+    Usage:
+        @router.get("/list", response=List[ScheduleOut])
+        @paginate(KeysetPagination, ordering=("-stopped",))
+        def list_items(request):
+            return Model.objects.all()
+    """
+
+    class Input(Schema):
+        cursor: Optional[str] = None
+        limit: int = Field(ninja_settings.PAGINATION_PER_PAGE, ge=1)
+        count: bool = False
+
+    class Output(Schema):
+        items: List[Any]
+        next_cursor: Optional[str] = None
+        count: Optional[int] = None
+
+    def __init__(
+        self,
+        ordering: Sequence[str] = ("-pk",),
+        max_limit: int = 500,
+        estimate_count: bool = True,
+        **kwargs: Any,
+    ) -> None:
+        self.keys = self._normalize_ordering(ordering)
+        self.max_limit = max_limit
+        self.estimate_count = estimate_count
+        super().__init__(**kwargs)
+
+    def paginate_queryset(
+        self,
+        queryset: QuerySet,
+        pagination: Input,
+        request: HttpRequest,
+        **params: Any,
+    ) -> Any:
+        limit = min(pagination.limit, self.max_limit)
+        page = queryset.order_by(
+            *[f"-{field}" if desc else field for field, desc in self.keys]
+        )
+        try:
+            if pagination.cursor:
+                page = page.filter(self._after(self.decode_cursor(pagination.cursor)))
+            rows = list(page[: limit + 1])
+        except (ValidationError, ValueError, TypeError):
+            raise HttpError(400, "Invalid cursor")
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = self.encode_cursor(rows[-1])
+
+        count = None
+        if pagination.count:
+            count = (
+                estimated_count(queryset)
+                if self.estimate_count
+                else self._items_count(queryset)
+            )
+
+        return {
+            self.items_attribute: rows,
+            "next_cursor": next_cursor,
+            "count": count,
+        }
+
+    def encode_cursor(self, row: Any) -> str:
+        """
+        The function `encode_cursor` builds the opaque cursor pointing just
+        after `row`.
+
+        Args:
+            row (Model | dict): The last row of the current page.
+
+        Returns:
+            str: A URL safe cursor string.
+        """
+        values = [self._value(row, field) for field, _ in self.keys]
+        data = json.dumps(values, default=_cursor_value, separators=(",", ":"))
+        return base64.urlsafe_b64encode(data.encode()).decode("ascii").rstrip("=")
+
+    def decode_cursor(self, cursor: str) -> List[Any]:
+        """
+        The function `decode_cursor` turns a cursor back into the ordering
+        values it was built from.
+
+        Args:
+            cursor (str): A cursor returned by `encode_cursor`.
+
+        Raises:
+            HttpError: If the cursor is malformed or was built for another
+                ordering.
+
+        Returns:
+            list: The ordering values, one per key.
+        """
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded))
+        except (binascii.Error, ValueError):
+            raise HttpError(400, "Invalid cursor")
+        if not isinstance(values, list) or len(values) != len(self.keys):
+            raise HttpError(400, "Invalid cursor")
+        return values
+
+    def _after(self, values: List[Any]) -> Q:
+        # (a, b, pk) > (x, y, z) expanded per column so mixed directions work
+        condition = Q()
+        for i, (field, desc) in enumerate(self.keys):
+            lookup = {f"{field}__{'lt' if desc else 'gt'}": values[i]}
+            for j, (prev_field, _) in enumerate(self.keys[:i]):
+                lookup[prev_field] = values[j]
+            condition |= Q(**lookup)
+        return condition
+
+    @staticmethod
+    def _value(row: Any, field: str) -> Any:
+        if isinstance(row, dict):
+            return row["id"] if field == "pk" and "pk" not in row else row[field]
+        value = row
+        for part in field.split("__"):
+            value = getattr(value, part)
+        return value
+
+    @staticmethod
+    def _normalize_ordering(ordering: Sequence[str]) -> List[Tuple[str, bool]]:
+        keys = [(field.lstrip("-"), field.startswith("-")) for field in ordering]
+        if not any(field in ("pk", "id") for field, _ in keys):
+            keys.append(("pk", keys[-1][1] if keys else False))
+        return keys
+
+
+def _cursor_value(value: Any) -> Any:
+    """
+    The function `_cursor_value` encodes ordering values that JSON has no
+    type for. Unlike the response renderers it keeps datetimes at full
+    microsecond precision, so rows a few microseconds apart are not skipped.
+
+    Args:
+        value (Any): A value of an ordering field.
+
+    Returns:
+        Any: a JSON serializable form the ORM accepts back in a lookup
+    """
+    if isinstance(value, (date, time)):
+        return value.isoformat()
+    if isinstance(value, (Decimal, UUID)):
+        return str(value)
+    raise TypeError(f"Cannot use {type(value).__name__} in a cursor")
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator for admin changelists of very large tables. The page count
+    comes from `estimated_count` (planner statistics on Postgres) instead of
+    a full `COUNT(*)`; page contents are still exact. Pair it with
+    `show_full_result_count = False` so the changelist does not count the
+    whole table a second time.
+    """
+
+    @cached_property
+    def count(self) -> int:
+        if isinstance(self.object_list, QuerySet):
+            return estimated_count(self.object_list)
+        return super().count
@@ -0,0 +1,181 @@
+import json
+from functools import wraps
+from typing import Any, Callable, Iterable, Optional, Type
+
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse
+from django.http.response import HttpResponseBase
+from ninja import Schema
+from ninja.parser import Parser
+from ninja.renderers import BaseRenderer
+from ninja.responses import NinjaJSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - stdlib fallback
+    orjson = None
+
+_fallback_encoder = NinjaJSONEncoder()
+
+
+def _default(obj: Any) -> Any:
+    """
+    The function `_default` converts values orjson does not know natively
+    (Decimal, lazy strings, pydantic models, querysets) using the same rules
+    as django-ninja's stock JSON encoder.
+
+    Args:
+        obj (Any): The value orjson could not serialize.
+
+    Returns:
+        Any: A JSON serializable representation of `obj`.
+    """
+    try:
+        return _fallback_encoder.default(obj)
+    except TypeError:
+        if hasattr(obj, "__iter__"):
+            return list(obj)
+        raise
+
+
+def dumps(data: Any) -> bytes:
+    """
+    The function `dumps` serializes `data` to JSON bytes, using orjson when it
+    is installed and the standard library otherwise.
+
+    Args:
+        data (Any): The data to serialize.
+
+    Returns:
+        bytes: The UTF-8 encoded JSON document.
+    """
+    if orjson is not None:
+        return orjson.dumps(
+            data,
+            default=_default,
+            option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS,
+        )
+    return json.dumps(data, cls=NinjaJSONEncoder).encode("utf-8")
+
+
+def loads(content: Any) -> Any:
+    """
+    The function `loads` parses a JSON document from bytes or str.
+
+    Args:
+        content (bytes | str): The JSON document.
+
+    Returns:
+        Any: The parsed document.
+    """
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+class FastJSONRenderer(BaseRenderer):
+    """
+    Response renderer for the NinjaAPI instance backed by orjson, with a
+    transparent fallback to the standard library json module.
+    """
+
+    media_type = "application/json"
+
+    def render(self, request: HttpRequest, data: Any, *, response_status: int) -> Any:
+        return dumps(data)
+
+
+class FastJSONParser(Parser):
+    """
+    Request body parser for the NinjaAPI instance backed by orjson, with a
+    transparent fallback to the standard library json module.
+    """
+
+    def parse_body(self, request: HttpRequest) -> Any:
+        return loads(request.body)
+
+
+def trusted_response(
+    data: Any,
+    schema: Optional[Type[Schema]] = None,
+    status: int = 200,
+    items_attribute: Optional[str] = None,
+) -> HttpResponse:
+    """
+    The function `trusted_response` renders `data` straight to an HttpResponse
+    so ninja does not re-validate it against the endpoint's response schema.
+    Only use it for data the backend built itself and that already has the
+    shape of `schema` (for example `.values()` querysets).
+
+    When `API_SKIP_RESPONSE_VALIDATION` is off (the default with DEBUG on)
+    and `schema` is given, the data is still validated so mismatches show up
+    during development.
+
+    Args:
+        data (Any): A dict, or an iterable of dicts, shaped like `schema`.
+        schema (Schema, optional): The schema `data` is expected to match.
+        status (int): The HTTP status code of the response.
+        items_attribute (str, optional): For a page returned by `@paginate`,
+            the key holding the rows; only the rows are checked against
+            `schema`.
+
+    Returns:
+        HttpResponse: The rendered JSON response.
+    """
+    if items_attribute is not None:
+        data = {**data, items_attribute: _validated(data[items_attribute], schema)}
+    else:
+        data = _validated(data, schema)
+    return HttpResponse(
+        dumps(data),
+        status=status,
+        content_type=f"{FastJSONRenderer.media_type}; charset=utf-8",
+    )
+
+
+def trusted(schema: Optional[Type[Schema]] = None) -> Callable:
+    """
+    The function `trusted` decorates a view so its result is rendered by
+    `trusted_response` instead of being validated by ninja. Place it between
+    the router decorator and `@paginate`; the page is then rendered as is
+    and only its rows are checked against `schema` while debugging.
+
+    Usage:
+        @router.get("/list", response=List[TaskOut])
+        @trusted(TaskOut)
+        @paginate(KeysetPagination, ordering=("-stopped",))
+        def list_items(request):
+            return Model.objects.values(*FIELDS)
+
+    Args:
+        schema (Schema, optional): The schema of the view's rows.
+
+    Returns:
+        Callable: the decorator
+    """
+
+    def decorator(func: Callable) -> Callable:
+        items_attribute = None
+        if getattr(func, "_ninja_is_paginated", False):
+            items_attribute = "items"
+
+        @wraps(func)
+        def wrapper(request: HttpRequest, *args, **kwargs) -> HttpResponseBase:
+            result = func(request, *args, **kwargs)
+            if isinstance(result, HttpResponseBase):
+                return result
+            return trusted_response(result, schema, items_attribute=items_attribute)
+
+        return wrapper
+
+    return decorator
+
+
+def _validated(data: Any, schema: Optional[Type[Schema]]) -> Any:
+    if not isinstance(data, dict) and isinstance(data, Iterable):
+        data = list(data)
+    if schema is None or getattr(settings, "API_SKIP_RESPONSE_VALIDATION", False):
+        return data
+    if isinstance(data, list):
+        return [schema.model_validate(item).model_dump() for item in data]
+    return schema.model_validate(data).model_dump()
@@ -0,0 +1,26 @@
+"""
+Module: workflows.py
+Description: Named task workflows, started by name with core.tasks.run_workflow.
+
+Build each workflow from `step`, `group`, `chain` and `chord` in
+core.services.workflows and register it with `register`. Steps in a group
+run in parallel on the cluster workers; stages of a chain run in order.
+"""
+
+from core.services.workflows import chain, chord, group, register, step
+from core.tasks import (
+    backup_database,
+    backup_media,
+    summarize_backups,
+    verify_database_backup,
+)
+
+
+@register("nightly_backup")
+def nightly_backup():
+    return chain(
+        chord(
+            group(step(backup_database), step(backup_media)), step(summarize_backups)
+        ),
+        step(verify_database_backup),
+    )
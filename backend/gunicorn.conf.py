@@ -0,0 +1,39 @@
+"""
+Module: gunicorn.conf.py
+Description: gunicorn settings for the web service, used by start.sh.
+
+The application is preloaded in the master process, so Django settings, apps
+and the URLconf are imported once and shared copy-on-write by every worker
+instead of being rebuilt per worker. Database connections are closed in the
+master before each fork so workers never share a socket.
+"""
+
+import os
+
+# Read by backend/settings.py to load the web worker app set
+os.environ.setdefault("DJANGO_PROCESS", "web")
+
+bind = "0.0.0.0:8000"
+workers = int(os.environ.get("GUNICORN_WORKERS", 1))
+# Threaded workers; event streams are served by the ASGI app (start_events.sh)
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", 32))
+preload_app = bool(int(os.environ.get("GUNICORN_PRELOAD", 1)))
+
+
+def when_ready(server):
+    # Build the URLconf (and with it every API router and schema) in the
+    # master so workers inherit it rather than paying for it on first request
+    if preload_app:
+        from django.db import connections
+        from django.urls import get_resolver
+
+        get_resolver().url_patterns
+        connections.close_all()
+
+
+def pre_fork(server, worker):
+    if preload_app:
+        from django.db import connections
+
+        connections.close_all()
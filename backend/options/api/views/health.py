@@ -1,17 +1,21 @@
 from ninja import Router
 
+from core.routers import replica_status
+
 health_router = Router(tags=["Health"])
 
 
 @health_router.get("/")
 def health_check(request):
     """
-    The function `health_check` returns ok if backend is ready.
+    The function `health_check` returns ok if backend is ready, along with
+    the lag of any read replicas.
 
     Args:
         request (HttpRequest): The HTTP request object.
 
     Returns:
         status (str): returns ok when backend is up
+        replicas (dict): per replica, whether it serves reads and its lag
     """
-    return {"status": "ok"}
+    return {"status": "ok", "replicas": replica_status()}
@@ -1,7 +1,5 @@
 from django.db import models
 from django.core.exceptions import ValidationError
-import pytz
-import os
 
 # Create your models here.
 
@@ -3,6 +3,7 @@
 python manage.py makemigrations --no-input
 python manage.py migrate --no-input
 python manage.py collectstatic --no-input
+python manage.py verify_static
 #python manage.py createcachetable
 
 if [ "$DJANGO_SUPERUSER_USERNAME" ]; then
@@ -16,4 +17,5 @@ fi
 python manage.py scheduletasks
 python manage.py load_version_fixture
 
-gunicorn backend.wsgi:application --bind 0.0.0.0:8000
\ No newline at end of file
+# Bind, threaded workers and app preloading are set in gunicorn.conf.py
+exec gunicorn -c gunicorn.conf.py backend.wsgi:application
\ No newline at end of file
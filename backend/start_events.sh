@@ -0,0 +1,13 @@
+#!/bin/bash
+
+# Server-Sent Events (core.api.events) are served by the ASGI app, where an
+# open stream waits on the event loop instead of holding a gunicorn thread.
+# Migrations and static files are handled by the backend service (start.sh).
+export DJANGO_PROCESS=web
+
+exec uvicorn backend.asgi:application \
+    --host 0.0.0.0 \
+    --port 8001 \
+    --workers "${EVENTS_WORKERS:-1}" \
+    --timeout-graceful-shutdown 5 \
+    --no-access-log
@@ -2,4 +2,9 @@
 
 python manage.py makemigrations --no-input
 python manage.py migrate --no-input
-python manage.py qcluster
\ No newline at end of file
+
+if [ "$QCLUSTER_AUTOSCALE" = "1" ]; then
+    exec python manage.py qsupervisor
+else
+    exec python manage.py qcluster
+fi
@@ -0,0 +1,54 @@
+// Writes .gz and .br siblings of the compressible files in dist/ after
+// `vite build`, for nginx gzip_static. Uses node's zlib only.
+import { readdirSync, readFileSync, statSync, writeFileSync } from "node:fs";
+import { join } from "node:path";
+import { brotliCompressSync, constants, gzipSync } from "node:zlib";
+
+const DIST = new URL("../dist/", import.meta.url).pathname;
+const EXTENSIONS = /\.(js|mjs|css|html|svg|json|map|txt|xml|ico|ttf|eot|otf)$/i;
+const MIN_SIZE = 256;
+const MIN_RATIO = 0.95;
+
+function* walk(dir) {
+  for (const entry of readdirSync(dir)) {
+    const path = join(dir, entry);
+    if (statSync(path).isDirectory()) {
+      yield* walk(path);
+    } else {
+      yield path;
+    }
+  }
+}
+
+let original = 0;
+let gzipped = 0;
+let brotlied = 0;
+for (const path of walk(DIST)) {
+  if (!EXTENSIONS.test(path)) continue;
+  const data = readFileSync(path);
+  if (data.length < MIN_SIZE) continue;
+  const gz = gzipSync(data, { level: 9 });
+  const br = brotliCompressSync(data, {
+    params: {
+      [constants.BROTLI_PARAM_QUALITY]: 9,
+      [constants.BROTLI_PARAM_SIZE_HINT]: data.length,
+    },
+  });
+  original += data.length;
+  if (gz.length < data.length * MIN_RATIO) {
+    writeFileSync(`${path}.gz`, gz);
+    gzipped += gz.length;
+  } else {
+    gzipped += data.length;
+  }
+  if (br.length < data.length * MIN_RATIO) {
+    writeFileSync(`${path}.br`, br);
+    brotlied += br.length;
+  } else {
+    brotlied += data.length;
+  }
+}
+
+console.log(
+  `precompress: ${original} bytes -> gzip ${gzipped}, brotli ${brotlied}`,
+);